@@ -0,0 +1,308 @@
+import os
+import sys
+import json
+import time
+import zlib
+import timeit
+import random
+import shutil
+import argparse
+import platform
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.join("outputs", "benchmarks")
+
+# Keep benchmark spans, metrics and latency samples out of the real outputs/ history
+os.environ.setdefault("TRACE_DIR", os.path.join(BENCH_DIR, "trace"))
+
+from utils import read_docx, save_docx, clean_markdown, format_timecode, save_json, save_assessment_docx
+from providers import COMPLETERS, complete, count_tokens, estimate_cost
+from transcript import Transcript
+from writers import write_outputs
+from search_index import index_transcript
+from history import percentile
+from tracing import span, tracer
+import synthetic_corpus
+
+# Simulated provider latency: fixed overhead plus time per 1k input tokens / per audio minute
+FAKE_BASE_LATENCY = 0.8
+FAKE_SECONDS_PER_1K_TOKENS = 0.15
+FAKE_SECONDS_PER_AUDIO_MINUTE = 2.0
+FAKE_JITTER = 0.25
+
+DEFAULT_WORKERS = 4
+DEFAULT_REPEAT = 5
+
+class FakeProvider:
+    """
+    Stand-in for the OpenAI/Gemini calls: sleeps for a log-normally jittered latency that
+    grows with the input size and returns well-formed answers. The latency of a request
+    depends only on its content and the seed, so runs are comparable.
+    """
+
+    def __init__(self, seed: int, speed: float = 1.0):
+        self.seed = seed
+        self.speed = speed
+
+    def _sleep(self, key: str, seconds: float):
+        rng = random.Random(zlib.crc32(key.encode("utf-8")) ^ self.seed)
+        time.sleep(seconds * rng.lognormvariate(0, FAKE_JITTER) / self.speed)
+
+    def transcribe(self, lines: List[dict], audio_seconds: float) -> list:
+        """Whisper-like segments (start, end, text) for a corpus call."""
+        self._sleep(f"audio:{audio_seconds}:{len(lines)}",
+                    FAKE_BASE_LATENCY + audio_seconds / 60 * FAKE_SECONDS_PER_AUDIO_MINUTE)
+        return [SimpleNamespace(start=l["start"], end=l["end"], text=l["text"]) for l in lines]
+
+    def complete(self, system_prompt: str, user_content: str, model: str) -> Tuple[str, Dict[str, float]]:
+        in_tokens = count_tokens(system_prompt + user_content, model)
+        self._sleep(user_content, FAKE_BASE_LATENCY + in_tokens / 1000 * FAKE_SECONDS_PER_1K_TOKENS)
+        if "identify speakers" in user_content:
+            lines = [line for line in user_content.split("\n\n", 1)[-1].splitlines() if line.strip()]
+            content = "\n".join(
+                f"{line[:10]} Speaker {'AB'[i % 2]}: {line[11:]}" for i, line in enumerate(lines)
+            )
+        elif "JSON" in system_prompt:
+            rng = random.Random(zlib.crc32(user_content.encode("utf-8")))
+            content = json.dumps(synthetic_corpus.agent_assessment(rng, [{"text": user_content[:200]}]),
+                                 ensure_ascii=False)
+        else:
+            content = "**Summary**\n* " + user_content[:300]
+        out_tokens = count_tokens(content, model)
+        return content, {"cost": 0.0, "in_tokens": in_tokens, "out_tokens": out_tokens}
+
+def git_revision() -> Tuple[Optional[str], bool]:
+    """Current commit and whether the tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+def measure(fn: Callable, repeat: int = DEFAULT_REPEAT) -> dict:
+    """Per-call timings of `fn` over `repeat` rounds, each long enough (>= 0.2s) to time reliably."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = sorted(t / number for t in timer.repeat(repeat, number))
+    # Spans recorded by the benchmarked functions are not needed afterwards
+    del tracer.spans[:]
+    return {"loops": number, "min": per_call[0], "median": per_call[len(per_call) // 2], "max": per_call[-1]}
+
+def run_micro(manifest: dict, work_dir: str, repeat: int) -> Dict[str, dict]:
+    """Micro-benchmarks of the local hot paths on the longest corpus call."""
+    call = max(manifest["calls"], key=lambda c: c["duration"])
+    with open(call["transcript_txt"], 'r', encoding='utf-8') as f:
+        text = f.read()
+    markdown = "\n".join(f"* **{line[:10]}** {line[11:]}" for line in text.splitlines())
+    summary = " ".join(l["text"] for l in call["lines"][:5])
+    with open(call["assessment"], 'r', encoding='utf-8') as f:
+        completion = f.read()
+    docx_out = os.path.join(work_dir, "micro_save.docx")
+    seconds = [i * 7.3 for i in range(1000)]
+
+    def gpt_cost():
+        in_tokens = count_tokens(text, "gpt-4o")
+        out_tokens = count_tokens(completion, "gpt-4o")
+        return estimate_cost("gpt-4o", in_tokens, out_tokens)
+
+    def export():
+        from export_to_excel import export_assessment
+        export_assessment(call["name"], os.path.dirname(call["assessment"]))
+
+    benchmarks = {
+        "read_docx": lambda: read_docx(call["transcript_docx"]),
+        "save_docx": lambda: save_docx(text, summary, docx_out, "Conversation Summary & Transcript"),
+        "clean_markdown": lambda: clean_markdown(markdown),
+        "format_timecode_x1000": lambda: [format_timecode(s) for s in seconds],
+        "gpt_cost": gpt_cost,
+        "export_to_excel": export,
+    }
+    results = {}
+    for name, fn in benchmarks.items():
+        print(f"      {name}...")
+        results[name] = measure(fn, repeat)
+        results[name]["input_chars"] = len(text) if name != "format_timecode_x1000" else None
+    return results
+
+def process_call(fake: FakeProvider, call: dict, work_dir: str, index_path: str) -> float:
+    """One call through the transcribe -> diarize -> summarize -> write -> assess path; returns its latency."""
+    start = time.time()
+    base = os.path.join(work_dir, call["name"])
+    with span("transcription", provider="fake", model="fake-whisper", task="transcription",
+              audio_seconds=call["duration"]):
+        segments = Transcript.from_whisper_segments(fake.transcribe(call["lines"], call["duration"]))
+
+    raw = segments.render(speakers=False)
+    with span("diarization", provider="fake", model="fake", task="diarization") as s:
+        dialogue_text, metrics = complete("fake", "fake", "Assign generic speaker labels.",
+                                          f"Please identify speakers and format this transcript:\n\n{raw}")
+        s.set(**metrics)
+    with span("summary", provider="fake", model="fake", task="summary") as s:
+        summary, metrics = complete("fake", "fake", "Summarize the conversation.", dialogue_text)
+        s.set(**metrics)
+
+    dialogue = Transcript.from_text(dialogue_text, segments.duration, timings=segments)
+    written = write_outputs(dialogue, summary, base, 'Conversation Summary & Transcript', ["docx", "srt", "vtt"])
+    index_transcript(written[0], dialogue, index_path)
+
+    with span("assessment", provider="fake", model="fake", task="agent_assessment") as s:
+        analysis, metrics = complete("fake", "fake", "Return STRICTLY valid JSON.", f"Analyze this transcript:\n\n{dialogue_text}")
+        s.set(**metrics)
+    json_text = clean_markdown(analysis)
+    save_json(json_text, base + "_assessment.json")
+    save_assessment_docx(json.loads(json_text), base + "_assessment.docx")
+    return time.time() - start
+
+def run_e2e(manifest: dict, work_dir: str, workers: int, seed: int, speed: float, rounds: int) -> dict:
+    """End-to-end latency per call and throughput, with every provider call simulated."""
+    fake = FakeProvider(seed, speed)
+    COMPLETERS["fake"] = fake.complete
+    stage_times: Dict[str, List[float]] = {}
+    lock = threading.Lock()
+
+    def on_span(s):
+        if s.attributes.get("provider") == "fake" or s.name in ("docx_write", "output_write"):
+            with lock:
+                stage_times.setdefault(s.name, []).append(s.duration)
+
+    tracer.add_listener(on_span)
+    index_path = os.path.join(work_dir, "search_index.sqlite")
+    calls = manifest["calls"] * rounds
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(lambda c: process_call(fake, c, work_dir, index_path), calls))
+    wall = time.time() - started
+    tracer.listeners.remove(on_span)
+    del tracer.spans[:]
+
+    audio_seconds = sum(c["duration"] for c in calls)
+    return {
+        "calls": len(calls),
+        "workers": workers,
+        "wall_seconds": wall,
+        "calls_per_second": len(calls) / wall,
+        "audio_seconds_per_second": audio_seconds / wall,
+        "latency": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+                    "mean": sum(latencies) / len(latencies), "max": max(latencies)},
+        "stages": {name: {"count": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+                   for name, values in sorted(stage_times.items())},
+    }
+
+def compare(old_path: str, new_path: str):
+    """Prints the change of every timing between two result files (negative is faster)."""
+    with open(old_path, 'r') as f:
+        old = json.load(f)
+    with open(new_path, 'r') as f:
+        new = json.load(f)
+
+    rows = []
+    for name, stats in new.get("micro", {}).items():
+        if name in old.get("micro", {}):
+            rows.append((f"micro {name} (median)", old["micro"][name]["median"], stats["median"]))
+    old_e2e, new_e2e = old.get("e2e") or {}, new.get("e2e") or {}
+    if old_e2e and new_e2e:
+        for q in ("p50", "p95"):
+            rows.append((f"e2e latency {q}", old_e2e["latency"][q], new_e2e["latency"][q]))
+        rows.append(("e2e wall time", old_e2e["wall_seconds"], new_e2e["wall_seconds"]))
+        for stage, stats in new_e2e["stages"].items():
+            if stage in old_e2e["stages"]:
+                rows.append((f"stage {stage} p95", old_e2e["stages"][stage]["p95"], stats["p95"]))
+
+    print(f"{old.get('meta', {}).get('commit')} -> {new.get('meta', {}).get('commit')}")
+    print("-" * 72)
+    for label, before, after in rows:
+        change = (after - before) / before if before else 0.0
+        print(f"{label:<36} | {before * 1000:>10.3f}ms | {after * 1000:>10.3f}ms | {change:>+7.1%}")
+    print("-" * 72)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local hot paths and the pipeline against a simulated provider.")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="Run the benchmarks and save the results as JSON (default)")
+    run.add_argument("--corpus", default=synthetic_corpus.CORPUS_DIR, help="Corpus directory (generated if missing)")
+    run.add_argument("--seed", type=int, default=synthetic_corpus.DEFAULT_SEED, help="Corpus and latency seed")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing rounds per micro-benchmark")
+    run.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent calls in the end-to-end run")
+    run.add_argument("--rounds", type=int, default=1, help="Times the corpus is processed end to end")
+    run.add_argument("--speed", type=float, default=1.0, help="Divide simulated provider latency by this factor")
+    run.add_argument("--skip-micro", action="store_true", help="Only run the end-to-end benchmark")
+    run.add_argument("--skip-e2e", action="store_true", help="Only run the micro-benchmarks")
+    run.add_argument("--output", "-o", default=None, help="Result file (default: outputs/benchmarks/bench_<time>_<commit>.json)")
+
+    cmp = sub.add_parser("compare", help="Compare two result files")
+    cmp.add_argument("old", help="Baseline result JSON")
+    cmp.add_argument("new", help="New result JSON")
+
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ("run", "compare", "-h", "--help"):
+        argv = ["run"] + argv
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        for path in (args.old, args.new):
+            if not os.path.exists(path):
+                print(f"Error: File '{path}' not found.")
+                sys.exit(1)
+        compare(args.old, args.new)
+        return
+
+    manifest_path = os.path.join(args.corpus, "manifest.json")
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    if manifest is None or manifest.get("seed") != args.seed:
+        print(f"\n[1/3] Generating corpus in {args.corpus} (seed {args.seed})...")
+        manifest = synthetic_corpus.generate(args.corpus, seed=args.seed)
+    else:
+        print(f"\n[1/3] Using corpus in {args.corpus} ({len(manifest['calls'])} calls)...")
+
+    work_dir = os.path.join(BENCH_DIR, "work")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    commit, dirty = git_revision()
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit, "dirty": dirty,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "seed": args.seed, "calls": len(manifest["calls"]),
+        },
+        "micro": {},
+        "e2e": None,
+    }
+    if not args.skip_micro:
+        print("[2/3] Micro-benchmarks...")
+        results["micro"] = run_micro(manifest, work_dir, args.repeat)
+    if not args.skip_e2e:
+        print(f"[3/3] End-to-end run ({args.workers} workers, simulated provider)...")
+        results["e2e"] = run_e2e(manifest, work_dir, args.workers, args.seed, args.speed, args.rounds)
+        results["e2e"]["speed"] = args.speed
+
+    output = args.output or os.path.join(
+        BENCH_DIR, f"bench_{datetime.now():%Y%m%d-%H%M%S}_{commit or 'nogit'}{'-dirty' if dirty else ''}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print("-" * 40)
+    print(f"SUCCESS: Results saved to {output}")
+    print("-" * 40)
+    for name, stats in results["micro"].items():
+        print(f"{name:<24} | {stats['median'] * 1000:>10.3f}ms")
+    if results["e2e"]:
+        e2e = results["e2e"]
+        print(f"{'E2E latency p50':<24} | {e2e['latency']['p50']:>10.2f}s")
+        print(f"{'E2E latency p95':<24} | {e2e['latency']['p95']:>10.2f}s")
+        print(f"{'E2E throughput':<24} | {e2e['calls_per_second']:>10.2f} calls/s")
+    print("-" * 40)
+
+if __name__ == "__main__":
+    main()
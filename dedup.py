@@ -0,0 +1,282 @@
+import os
+import json
+import math
+import wave
+import shutil
+import sqlite3
+import hashlib
+import subprocess
+import zlib
+from array import array
+from typing import List, NamedTuple, Optional, Tuple
+
+from search_index import tokenize
+from tracing import span, tracer
+from utils import content_hash
+
+DEDUP_PATH = os.path.join("outputs", "dedup.sqlite")
+
+# Decoded-audio fingerprint: one bit per frame, set when the frame is louder than the previous one,
+# plus a mask of the voiced (non-silent) frames
+FINGERPRINT_RATE = 8000
+FRAME_SECONDS = 0.1
+SILENCE_RMS = 100.0
+
+# Near-duplicate audio: durations within this many seconds, bits agreeing above the threshold
+DURATION_TOLERANCE = 2.0
+MAX_SHIFT_FRAMES = 20
+AUDIO_SIMILARITY = 0.9
+MIN_FRAMES = 50
+# Only frames voiced in either recording are compared; silence agrees with any silence
+MIN_VOICED_FRAMES = 50
+
+# Transcript MinHash: word shingles, permutations, and LSH bands of ROWS_PER_BAND rows
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 64
+ROWS_PER_BAND = 4
+TRANSCRIPT_SIMILARITY = 0.8
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def _permutations() -> List[tuple]:
+    # Fixed seeds so signatures stay comparable across runs
+    seeds = hashlib.sha256(b"speech2text-minhash").digest()
+    params = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.sha256(seeds + i.to_bytes(2, "big")).digest()
+        params.append((int.from_bytes(digest[:8], "big") % _PRIME or 1, int.from_bytes(digest[8:16], "big") % _PRIME))
+    return params
+
+PERMUTATIONS = _permutations()
+
+def decode_pcm(path: str) -> Optional[array]:
+    """Decodes audio to mono 16-bit PCM at FINGERPRINT_RATE (ffmpeg, or the wave module for PCM WAV)."""
+    if shutil.which("ffmpeg"):
+        result = subprocess.run(
+            ["ffmpeg", "-v", "quiet", "-i", path, "-ac", "1", "-ar", str(FINGERPRINT_RATE), "-f", "s16le", "-"],
+            capture_output=True,
+        )
+        if result.returncode == 0 and result.stdout:
+            samples = array('h')
+            samples.frombytes(result.stdout[:len(result.stdout) // 2 * 2])
+            return samples
+    try:
+        with wave.open(path, 'rb') as w:
+            if w.getsampwidth() != 2:
+                return None
+            channels, rate = w.getnchannels(), w.getframerate()
+            samples = array('h')
+            samples.frombytes(w.readframes(w.getnframes()))
+    except (wave.Error, EOFError, OSError):
+        return None
+    if channels > 1:
+        samples = samples[::channels]
+    if rate != FINGERPRINT_RATE:
+        # Nearest-sample resampling is enough for a loudness envelope
+        step = rate / FINGERPRINT_RATE
+        samples = array('h', (samples[int(i * step)] for i in range(int(len(samples) / step))))
+    return samples
+
+def audio_fingerprint(samples: array) -> Optional[str]:
+    """
+    Loudness-envelope fingerprint, robust to re-encoding: bit i = frame i louder than frame
+    i-1, with a second mask of the frames above the silence level.
+    """
+    frame = int(FINGERPRINT_RATE * FRAME_SECONDS)
+    levels = []
+    for i in range(0, len(samples) - frame + 1, frame):
+        chunk = samples[i:i + frame]
+        levels.append(math.sqrt(sum(s * s for s in chunk) / frame))
+    if len(levels) < MIN_FRAMES:
+        return None
+    bits = 0
+    voiced = 0
+    for i in range(1, len(levels)):
+        loud = levels[i] > SILENCE_RMS and levels[i] > levels[i - 1]
+        bits = (bits << 1) | loud
+        voiced = (voiced << 1) | (levels[i] > SILENCE_RMS)
+    return f"{len(levels) - 1}:{bits:x}:{voiced:x}"
+
+def fingerprint_similarity(a: str, b: str) -> float:
+    """
+    Best fraction of agreeing bits among frames voiced in either recording, over small
+    alignment shifts (tolerates trimmed lead-in). Mostly silent recordings never match.
+    """
+    parts_a, parts_b = a.split(":"), b.split(":")
+    if len(parts_a) != 3 or len(parts_b) != 3:
+        # Fingerprint without a voiced mask (older index entry): not comparable
+        return 0.0
+    len_a, len_b = int(parts_a[0]), int(parts_b[0])
+    bits_a, bits_b = int(parts_a[1], 16), int(parts_b[1], 16)
+    voiced_a, voiced_b = int(parts_a[2], 16), int(parts_b[2], 16)
+    best = 0.0
+    for shift in range(-MAX_SHIFT_FRAMES, MAX_SHIFT_FRAMES + 1):
+        # Align a's first bit with b's bit `shift` and compare the overlap
+        start_b = max(shift, 0)
+        start_a = max(-shift, 0)
+        overlap = min(len_a - start_a, len_b - start_b)
+        if overlap < MIN_FRAMES:
+            continue
+        mask = (1 << overlap) - 1
+        shift_a, shift_b = len_a - start_a - overlap, len_b - start_b - overlap
+        voiced = ((voiced_a >> shift_a) | (voiced_b >> shift_b)) & mask
+        frames = voiced.bit_count()
+        if frames < MIN_VOICED_FRAMES:
+            continue
+        differ = ((bits_a >> shift_a) ^ (bits_b >> shift_b)) & voiced
+        best = max(best, 1 - differ.bit_count() / frames)
+    return best
+
+def minhash(text: str) -> List[int]:
+    """MinHash signature of the transcript's word shingles."""
+    words = tokenize(text)
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles if s]
+    if not hashes:
+        return []
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in PERMUTATIONS]
+
+def signature_similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def _bands(signature: List[int]) -> List[str]:
+    return [
+        f"{i}:" + hashlib.blake2b(json.dumps(signature[i:i + ROWS_PER_BAND]).encode(), digest_size=8).hexdigest()
+        for i in range(0, len(signature), ROWS_PER_BAND)
+    ]
+
+def assessment_kind(task: str, provider: str, inputs: dict) -> str:
+    """Transcript dedup key: an earlier result only counts if it came from the same prompt and model."""
+    return f"{task}:{provider}:{inputs.get('model')}:{inputs.get('prompt')}"
+
+def _same_file(a: str, b: str) -> bool:
+    return os.path.abspath(a) == os.path.abspath(b)
+
+class AudioKey(NamedTuple):
+    sha256: str
+    fingerprint: Optional[str]
+
+class DedupIndex:
+    """Registry of processed recordings and transcripts and the outputs they produced."""
+
+    def __init__(self, path: str = DEDUP_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS audio (
+                sha256 TEXT PRIMARY KEY, path TEXT, duration REAL, fingerprint TEXT, outputs TEXT
+            );
+            CREATE INDEX IF NOT EXISTS audio_duration ON audio (duration);
+            CREATE TABLE IF NOT EXISTS transcripts (
+                id INTEGER PRIMARY KEY, kind TEXT, source TEXT, signature TEXT, outputs TEXT
+            );
+            CREATE TABLE IF NOT EXISTS transcript_bands (band TEXT, transcript_id INTEGER);
+            CREATE INDEX IF NOT EXISTS transcript_bands_band ON transcript_bands (band);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def find_audio(self, path: str, duration: float) -> Tuple[Optional[dict], AudioKey]:
+        """
+        Looks for an earlier recording with the same bytes, then for one with the same decoded
+        audio. Returns the match (or None) and the key to register this recording under.
+        The file's own earlier registration is not a duplicate of it.
+        """
+        with span("dedup_audio", file_size=os.path.getsize(path), audio_seconds=duration) as s:
+            sha = content_hash(path)
+            row = self.db.execute("SELECT path, outputs, fingerprint FROM audio WHERE sha256 = ?", (sha,)).fetchone()
+            if row and not _same_file(row[0], path):
+                s.set(match="exact")
+                return {"path": row[0], "outputs": json.loads(row[1]), "match": "exact", "similarity": 1.0}, AudioKey(sha, row[2])
+
+            if row and row[2]:
+                key = AudioKey(sha, row[2])
+            else:
+                samples = decode_pcm(path)
+                key = AudioKey(sha, audio_fingerprint(samples) if samples is not None else None)
+            if key.fingerprint is None:
+                return None, key
+            best = None
+            for other_path, other_fp, outputs in self.db.execute(
+                "SELECT path, fingerprint, outputs FROM audio WHERE fingerprint IS NOT NULL AND duration BETWEEN ? AND ?",
+                (duration - DURATION_TOLERANCE, duration + DURATION_TOLERANCE),
+            ):
+                if _same_file(other_path, path):
+                    continue
+                similarity = fingerprint_similarity(key.fingerprint, other_fp)
+                if similarity >= AUDIO_SIMILARITY and (best is None or similarity > best["similarity"]):
+                    best = {"path": other_path, "outputs": json.loads(outputs), "match": "near", "similarity": similarity}
+            s.set(match=best["match"] if best else None)
+            return best, key
+
+    def add_audio(self, key: AudioKey, path: str, duration: float, outputs: List[str]):
+        """Registers a processed recording with the outputs it produced (keeping a stored fingerprint)."""
+        with self.db:
+            self.db.execute(
+                "INSERT INTO audio VALUES (?, ?, ?, ?, ?) ON CONFLICT (sha256) DO UPDATE SET path = excluded.path, "
+                "duration = excluded.duration, fingerprint = COALESCE(excluded.fingerprint, audio.fingerprint), "
+                "outputs = excluded.outputs",
+                (key.sha256, path, duration, key.fingerprint, json.dumps(outputs)),
+            )
+
+    def find_transcript(self, signature: List[int], kind: str, source: Optional[str] = None) -> Optional[dict]:
+        """
+        Returns an earlier transcript of the same kind whose MinHash similarity passes the
+        threshold, other than source itself.
+        """
+        if not signature:
+            return None
+        with span("dedup_transcript", task=kind) as s:
+            bands = _bands(signature)
+            best = None
+            # LSH: only transcripts sharing at least one band are compared
+            for other_source, other, outputs in self.db.execute(
+                "SELECT source, signature, outputs FROM transcripts WHERE kind = ? AND id IN ("
+                f"SELECT transcript_id FROM transcript_bands WHERE band IN ({','.join('?' * len(bands))}))",
+                [kind] + bands,
+            ):
+                if source and _same_file(other_source, source):
+                    continue
+                similarity = signature_similarity(signature, json.loads(other))
+                if similarity >= TRANSCRIPT_SIMILARITY and (best is None or similarity > best["similarity"]):
+                    best = {"path": other_source, "outputs": json.loads(outputs),
+                            "match": "exact" if similarity == 1.0 else "near", "similarity": similarity}
+            s.set(match=best["match"] if best else None)
+            return best
+
+    def add_transcript(self, signature: List[int], kind: str, source: str, outputs: List[str]):
+        """Registers an assessed transcript with the outputs it produced."""
+        if not signature:
+            return
+        with self.db:
+            # A reassessed transcript replaces its earlier entry
+            self.db.execute("DELETE FROM transcript_bands WHERE transcript_id IN "
+                            "(SELECT id FROM transcripts WHERE kind = ? AND source = ?)", (kind, source))
+            self.db.execute("DELETE FROM transcripts WHERE kind = ? AND source = ?", (kind, source))
+            transcript_id = self.db.execute(
+                "INSERT INTO transcripts (kind, source, signature, outputs) VALUES (?, ?, ?, ?)",
+                (kind, source, json.dumps(signature), json.dumps(outputs)),
+            ).lastrowid
+            self.db.executemany("INSERT INTO transcript_bands VALUES (?, ?)",
+                                [(band, transcript_id) for band in _bands(signature)])
+
+def reuse_outputs(match: dict, targets: List[str]) -> bool:
+    """
+    Copies the outputs of an earlier duplicate to this run's output paths, matching them by
+    extension. Returns False (nothing copied) unless every target has a source other than
+    the target itself, which would only be this run's own stale output.
+    """
+    sources = {os.path.splitext(p)[1]: p for p in match["outputs"] if os.path.exists(p)}
+    pairs = [(sources.get(os.path.splitext(t)[1]), t) for t in targets]
+    if any(src is None or _same_file(src, dst) for src, dst in pairs):
+        return False
+    for src, dst in pairs:
+        # A copy, not a hardlink: a later --no-dedup run rewrites dst in place
+        shutil.copyfile(src, dst)
+    tracer.count("duplicates_skipped_total", match=match["match"])
+    return True
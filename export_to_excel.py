@@ -4,6 +4,8 @@ import json
 import pandas as pd
 import argparse
 
+from stages import StageStore, stage_inputs
+
 def flatten_dict(d, parent_key='', sep='_'):
     items = []
     for k, v in d.items():
@@ -62,24 +64,26 @@ def process_agent_assessment(data):
         })
     return pd.DataFrame(rows)
 
-def main():
-    parser = argparse.ArgumentParser(description="Export assessment JSONs to a multi-tab Excel file.")
-    parser.add_argument("base_name", help="Base name of the files in the outputs directory")
-    
-    args = parser.parse_args()
-    outputs_dir = "outputs"
-    
-    files = {
-        "Quantitative": f"{args.base_name}_gemini_notations.json",
-        "Qualitative": f"{args.base_name}_gemini_qualitative.json",
-        "Agent Assessment": f"{args.base_name}_gemini_assessment.json"
+def assessment_files(base_name: str, outputs_dir: str = "outputs", provider: str = "gemini") -> dict:
+    """The JSON read for each tab of the workbook."""
+    return {
+        "Quantitative": os.path.join(outputs_dir, f"{base_name}_{provider}_notations.json"),
+        "Qualitative": os.path.join(outputs_dir, f"{base_name}_{provider}_qualitative.json"),
+        "Agent Assessment": os.path.join(outputs_dir, f"{base_name}_{provider}_assessment.json")
     }
-    
-    output_path = os.path.join(outputs_dir, f"{args.base_name}_final_assessment.xlsx")
+
+def workbook_path(base_name: str, outputs_dir: str = "outputs", provider: str = "gemini") -> str:
+    # Gemini results keep the original workbook name
+    suffix = "" if provider == "gemini" else f"_{provider}"
+    return os.path.join(outputs_dir, f"{base_name}{suffix}_final_assessment.xlsx")
+
+def export_assessment(base_name: str, outputs_dir: str = "outputs", provider: str = "gemini") -> str:
+    """Writes the notations/qualitative/assessment JSONs of `base_name` to one multi-tab workbook."""
+    files = assessment_files(base_name, outputs_dir, provider)
+    output_path = workbook_path(base_name, outputs_dir, provider)
     
     with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-        for sheet_name, filename in files.items():
-            file_path = os.path.join(outputs_dir, filename)
+        for sheet_name, file_path in files.items():
             if not os.path.exists(file_path):
                 print(f"Warning: {file_path} not found. Skipping {sheet_name} tab.")
                 continue
@@ -110,6 +114,25 @@ def main():
                 adjusted_width = (max_length + 2)
                 worksheet.column_dimensions[column].width = min(adjusted_width, 50) # Cap width
 
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Export assessment JSONs to a multi-tab Excel file.")
+    parser.add_argument("base_name", help="Base name of the files in the outputs directory")
+    parser.add_argument("--provider", default="gemini", choices=["gemini", "openai"], help="Provider whose assessments are exported")
+    parser.add_argument("--force", action="store_true", help="Export even if the workbook is up to date")
+    
+    args = parser.parse_args()
+    stages = StageStore()
+    output_path = workbook_path(args.base_name, provider=args.provider)
+    inputs = stage_inputs(assessment_files(args.base_name, provider=args.provider))
+    if stages.up_to_date("export", [output_path], inputs, args.force):
+        print(f"SUCCESS: {output_path} up to date (assessments unchanged).")
+        return
+
+    output_path = export_assessment(args.base_name, provider=args.provider)
+    stages.record("export", [output_path], inputs)
+
     print(f"SUCCESS: Multi-tab assessment exported to {output_path}")
 
 if __name__ == "__main__":
@@ -2,25 +2,26 @@ import os
 import sys
 import argparse
 import time
-from typing import Tuple
-import google.generativeai as genai
+from typing import Tuple, Optional
 from dotenv import load_dotenv
 
 from utils import read_docx, save_json, clean_markdown
-from prompt_manager import load_prompt
+from prompt_manager import load_prompt, prompt_path
+from tracing import span
+import hedging
+from hedging import HedgePolicy
+from dedup import DedupIndex, assessment_kind, minhash, reuse_outputs
+from providers import complete, count_tokens, DEFAULT_MODELS
+from router import BudgetExceeded, add_arguments, from_args
+from stages import StageStore, stage_inputs
 
 # Load environmental variables from .env file
 load_dotenv()
 
-# Initialize Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+PROVIDER = "gemini"
 
-# Pricing constants
-PRICING = {
-    "gemini-output": 0.40 / 1000000
-}
-
-def run_analysis(transcript_text: str, prompt_category: str, prompt_name: str) -> Tuple[str, float, float]:
+def run_analysis(transcript_text: str, prompt_category: str, prompt_name: str, model: str = DEFAULT_MODELS[PROVIDER],
+                 hedge: Optional[HedgePolicy] = None) -> Tuple[str, float, float]:
     """Runs a specific analysis using a prompt."""
     start_time = time.time()
     prompt_content = load_prompt(prompt_category, prompt_name)
@@ -28,15 +29,16 @@ def run_analysis(transcript_text: str, prompt_category: str, prompt_name: str) -
     print(f"      Running analysis: {prompt_name}...")
     
     try:
-        model = genai.GenerativeModel("models/gemini-flash-latest")
-        response = model.generate_content([prompt_content, f"Transcript to analyze:\n\n{transcript_text}"])
-        content = response.text.strip()
-        
-        total_tokens = (len(prompt_content.split()) + len(transcript_text.split()) + len(content.split())) * 1.5
-        token_cost = total_tokens * PRICING["gemini-output"]
+        user_content = f"Transcript to analyze:\n\n{transcript_text}"
+        if hedge is not None:
+            content, metrics = hedge.run(prompt_content, user_content, task=prompt_name, target=(PROVIDER, model))
+        else:
+            with span("assessment", provider=PROVIDER, model=model, task=prompt_name) as s:
+                content, metrics = complete(PROVIDER, model, prompt_content, user_content)
+                s.set(**metrics)
         
         elapsed = time.time() - start_time
-        return content, elapsed, token_cost
+        return content.strip(), elapsed, metrics["cost"]
     except Exception as e:
         print(f"Error during Gemini analysis: {e}")
         sys.exit(1)
@@ -44,6 +46,10 @@ def run_analysis(transcript_text: str, prompt_category: str, prompt_name: str) -
 def main():
     parser = argparse.ArgumentParser(description="Analyze transcript using multiple Gemini project assessment prompts.")
     parser.add_argument("docx_path", help="Path to the transcribed .docx file")
+    hedging.add_arguments(parser)
+    add_arguments(parser)
+    parser.add_argument("--no-dedup", action="store_true", help="Analyze the transcript even if it duplicates an earlier one")
+    parser.add_argument("--force", action="store_true", help="Run every analysis even if its output is up to date (implies --no-dedup)")
     
     args = parser.parse_args()
     
@@ -55,6 +61,19 @@ def main():
         print("Error: GEMINI_API_KEY not found.")
         sys.exit(1)
 
+    try:
+        router = from_args(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    try:
+        # One policy (and hedge budget) shared by all analyses of the run
+        hedge = hedging.from_args(args, None, (PROVIDER, DEFAULT_MODELS[PROVIDER]))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     total_start = time.time()
     transcript_text = read_docx(args.docx_path)
     
@@ -73,15 +92,42 @@ def main():
     
     total_cost = 0.0
     results = {}
+    stages = StageStore()
+    dedup = DedupIndex()
+    signature = minhash(transcript_text)
+    in_tokens = count_tokens(transcript_text, DEFAULT_MODELS[PROVIDER])
 
     os.makedirs("outputs", exist_ok=True)
     for cat, name in analyses:
-        content, elapsed, cost = run_analysis(transcript_text, cat, name)
+        output_filename = os.path.join("outputs", f"{base_name}_{name}.json")
+        inputs = stage_inputs({"transcript": args.docx_path, "prompt": prompt_path(cat, name)},
+                              model=DEFAULT_MODELS[PROVIDER])
+        if stages.up_to_date(name, [output_filename], inputs, args.force,
+                             lambda: router.preferred_fits(name, PROVIDER, in_tokens=in_tokens)):
+            print(f"      {name}: {output_filename} up to date (transcript, prompt and model unchanged).")
+            with open(output_filename, 'r', encoding='utf-8') as f:
+                results[name] = f.read()
+            continue
+        kind = assessment_kind(name, PROVIDER, inputs)
+        match = dedup.find_transcript(signature, kind, args.docx_path)
+        if match and not (args.no_dedup or args.force) and reuse_outputs(match, [output_filename]):
+            stages.record(name, [output_filename], inputs)
+            print(f"      {name}: transcript duplicates '{match['path']}' ({match['similarity']:.0%} similar); reused its results.")
+            with open(output_filename, 'r', encoding='utf-8') as f:
+                results[name] = f.read()
+            continue
+        try:
+            route = router.choose(name, PROVIDER, in_tokens=in_tokens)
+        except BudgetExceeded as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        content, elapsed, cost = run_analysis(transcript_text, cat, name, route.model, hedge)
         clean_content = clean_markdown(content)
         results[name] = clean_content
         total_cost += cost
-        output_filename = os.path.join("outputs", f"{base_name}_{name}.json")
         save_json(clean_content, output_filename)
+        dedup.add_transcript(signature, kind, args.docx_path, [output_filename])
+        stages.record(name, [output_filename], inputs, route.model)
 
     print("\n[3/3] Final JSON Results (Project Assessment):")
     for name, content in results.items():
@@ -3,25 +3,25 @@ import sys
 import argparse
 import time
 from typing import Tuple
-import google.generativeai as genai
 from dotenv import load_dotenv
 
-from utils import get_audio_duration, save_docx
-from prompt_manager import load_prompt
+from utils import get_audio_duration
+from prompt_manager import load_prompt, prompt_path
+from tracing import span
+from writers import write_outputs, parse_formats, WRITERS
+from dedup import DedupIndex, reuse_outputs
+from search_index import index_transcript, transcript_from_text
+from providers import gemini_client, gemini_complete, count_tokens, estimate_cost, GEMINI_MODEL
+from router import BudgetExceeded, add_arguments, from_args
+from stages import StageStore, stage_inputs
 
 # Load environmental variables from .env file
 load_dotenv()
 
-# Initialize Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Shared, configured Gemini client
+genai = gemini_client()
 
-# Pricing constants for Gemini 1.5 Flash (Approximate)
-PRICING = {
-    "gemini-audio": 0.05 / 3600,   # $0.05 per hour
-    "gemini-output": 0.40 / 1000000 # $0.40 per 1M tokens
-}
-
-def process_with_gemini(audio_path: str) -> Tuple[str, str, float, float]:
+def process_with_gemini(audio_path: str, model_name: str = GEMINI_MODEL) -> Tuple[str, str, float, float]:
     """Transcribes and summarizes audio using Gemini 1.5 Flash."""
     start_time = time.time()
     audio_duration = get_audio_duration(audio_path)
@@ -29,37 +29,46 @@ def process_with_gemini(audio_path: str) -> Tuple[str, str, float, float]:
     print(f"\n[1/2] Uploading and processing audio: {os.path.basename(audio_path)}...")
     
     try:
-        audio_file = genai.upload_file(path=audio_path)
-        while audio_file.state.name == "PROCESSING":
-            time.sleep(1)
-            audio_file = genai.get_file(audio_file.name)
+        with span("upload", provider="gemini", file_size=os.path.getsize(audio_path)):
+            audio_file = genai.upload_file(path=audio_path)
+        with span("poll", provider="gemini") as s:
+            polls = 0
+            while audio_file.state.name == "PROCESSING":
+                time.sleep(1)
+                audio_file = genai.get_file(audio_file.name)
+                polls += 1
+            s.set(polls=polls)
 
-        if audio_file.state.name == "FAILED":
-            raise Exception("Gemini file processing failed.")
+            if audio_file.state.name == "FAILED":
+                raise Exception("Gemini file processing failed.")
 
-        model = genai.GenerativeModel("models/gemini-flash-latest")
+        # Instructions go first (as system instruction) in every request, the call-specific content after
+        transcription_prompt = load_prompt("transcription", "darija_transcription")
+        model = genai.GenerativeModel(model_name, system_instruction=transcription_prompt)
 
-        # 1. Transcription
+        # 1. Transcription (includes speaker identification)
         print("      Transcribing and identifying speakers...")
-        transcription_prompt = load_prompt("transcription", "darija_transcription")
-        response = model.generate_content([audio_file, transcription_prompt])
-        transcript = response.text
+        with span("transcription", provider="gemini", model=model_name, task="transcription",
+                  audio_seconds=audio_duration) as s:
+            response = model.generate_content(audio_file)
+            transcript = response.text
+            out_tokens = count_tokens(transcript, model_name)
+            transcription_cost = estimate_cost(model_name, out_tokens=out_tokens, audio_seconds=audio_duration)
+            s.set(out_tokens=out_tokens, cost=transcription_cost)
         
         # 2. Summarization
         print("[2/2] Generating summary...")
-        summary_prompt = "Provide a concise summary of this interview including key points and action items."
-        summary_response = model.generate_content([transcript, summary_prompt])
-        summary = summary_response.text
-
-        # Cost calculation
-        audio_cost = audio_duration * PRICING["gemini-audio"]
-        total_tokens = (len(transcript.split()) + len(summary.split())) * 1.5
-        token_cost = total_tokens * PRICING["gemini-output"]
+        with span("summary", provider="gemini", model=model_name, task="summary") as s:
+            summary_prompt = "Provide a concise summary of this interview including key points and action items."
+            summary, metrics = gemini_complete(summary_prompt, transcript, model_name)
+            s.set(**metrics)
+
+        cost = transcription_cost + metrics["cost"]
         
         elapsed = time.time() - start_time
         genai.delete_file(audio_file.name)
         
-        return transcript, summary, elapsed, (audio_cost + token_cost)
+        return transcript, summary, elapsed, cost
         
     except Exception as e:
         print(f"Error during Gemini processing: {e}")
@@ -69,8 +78,18 @@ def main():
     parser = argparse.ArgumentParser(description="Transcribe and summarize audio using Google Gemini.")
     parser.add_argument("audio_path", help="Path to the audio file")
     parser.add_argument("--output", "-o", default=None, help="Output Word file path")
+    parser.add_argument("--formats", "-f", default="docx",
+                        help=f"Comma-separated output formats ({','.join(WRITERS)}); other formats share the output's base name")
+    add_arguments(parser)
+    parser.add_argument("--no-dedup", action="store_true", help="Process the file even if it duplicates an earlier recording")
+    parser.add_argument("--force", action="store_true", help="Transcribe even if the outputs are up to date (implies --no-dedup)")
     
     args = parser.parse_args()
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     
     if not os.path.exists(args.audio_path):
         print(f"Error: File '{args.audio_path}' not found.")
@@ -85,17 +104,55 @@ def main():
         if not os.path.dirname(args.output):
             args.output = os.path.join("outputs", args.output)
 
+    output_base = os.path.splitext(args.output)[0]
+    targets = [output_base + WRITERS[f].extension for f in formats]
+    # A run skipped as up to date still uses up its item of the batch (see router.from_args)
+    try:
+        router = from_args(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    stages = StageStore()
+    inputs = stage_inputs({"audio": args.audio_path, "prompt": prompt_path("transcription", "darija_transcription")},
+                          model=GEMINI_MODEL)
+    preferred_fits = lambda: router.preferred_fits("transcription", "gemini",
+                                                   audio_seconds=get_audio_duration(args.audio_path))
+    if stages.up_to_date("transcription", targets, inputs, args.force, preferred_fits):
+        print(f"SUCCESS: {', '.join(targets)} up to date (audio, prompt and model unchanged).")
+        sys.exit(0)
+
     if not os.getenv("GEMINI_API_KEY"):
         print("Error: GEMINI_API_KEY not found.")
         sys.exit(1)
 
+    dedup = DedupIndex()
+    duration = get_audio_duration(args.audio_path)
+    match, audio_key = dedup.find_audio(args.audio_path, duration)
+    if match and not (args.no_dedup or args.force):
+        if reuse_outputs(match, targets):
+            stages.record("transcription", targets, inputs)
+            print(f"SUCCESS: '{args.audio_path}' duplicates '{match['path']}' ({match['match']} match, "
+                  f"{match['similarity']:.0%}); reused {', '.join(targets)}")
+            sys.exit(0)
+        print(f"Warning: '{args.audio_path}' duplicates '{match['path']}' but its outputs cannot be reused; reprocessing.")
+
+    try:
+        route = router.choose("transcription", "gemini", audio_seconds=duration)
+    except BudgetExceeded as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     total_start = time.time()
-    transcript, summary, elapsed, cost = process_with_gemini(args.audio_path)
-    save_docx(transcript, summary, args.output, 'Conversation Summary & Transcript')
+    transcript, summary, elapsed, cost = process_with_gemini(args.audio_path, route.model)
+    written = write_outputs(transcript, summary, output_base, 'Conversation Summary & Transcript', formats)
+    index_transcript(written[0], transcript_from_text(transcript))
+    dedup.add_audio(audio_key, args.audio_path, duration, written)
+    stages.record("transcription", written, inputs, route.model)
     total_time = time.time() - total_start
 
     print("-" * 40)
-    print(f"SUCCESS: Report saved to {args.output}")
+    print(f"SUCCESS: Report saved to {', '.join(written)}")
     print("-" * 40)
     print(f"{'Metric':<20} | {'Value'}")
     print("-" * 40)
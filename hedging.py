@@ -0,0 +1,158 @@
+import threading
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import Dict, Optional, Tuple
+
+from providers import complete, available, count_tokens, estimate_cost, DEFAULT_MODELS
+from history import history
+from tracing import span, tracer
+from router import DEFAULT_OUTPUT_RATIO
+
+# Latency percentile of the primary after which a hedge request is fired
+DEFAULT_QUANTILE = 0.95
+
+# Hedge delay used until the task has enough latency samples
+DEFAULT_DELAY = 30.0
+MIN_SAMPLES = 5
+
+# Maximum extra dollars spent on hedge requests per run
+DEFAULT_BUDGET = 0.50
+
+def parse_target(value: str) -> Tuple[str, str]:
+    """Parses "provider" or "provider:model" into a (provider, model) pair."""
+    provider, _, model = value.partition(":")
+    provider = provider.strip().lower()
+    if provider not in DEFAULT_MODELS:
+        raise ValueError(f"Unknown provider '{provider}' (available: {', '.join(DEFAULT_MODELS)})")
+    return provider, model.strip() or DEFAULT_MODELS[provider]
+
+def alternate(provider: str) -> Tuple[str, str]:
+    """The default hedge target for a provider: the other provider's default model."""
+    other = "gemini" if provider == "openai" else "openai"
+    return other, DEFAULT_MODELS[other]
+
+class HedgePolicy:
+    """
+    Runs a text task on a primary provider and, when it is slower than the observed
+    latency percentile for that task (or fails), fires the same request at a secondary
+    provider/model and keeps whichever answers first.
+    """
+
+    def __init__(self, task: Optional[str], primary: Tuple[str, str], secondary: Optional[Tuple[str, str]] = None,
+                 quantile: float = DEFAULT_QUANTILE, budget: float = DEFAULT_BUDGET,
+                 max_request_cost: Optional[float] = None, stage: str = "assessment"):
+        self.task = task
+        self.primary = primary
+        # Without an explicit target, each request hedges to the other provider of its own target
+        self.secondary = secondary
+        self.quantile = quantile
+        self.budget = budget
+        self.max_request_cost = max_request_cost
+        self.stage = stage
+        self.spent = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self, task: str, primary: Optional[Tuple[str, str]] = None) -> float:
+        """Seconds to wait on the primary before hedging."""
+        primary = primary or self.primary
+        samples = history.get(task, *primary)
+        if len(samples) < MIN_SAMPLES:
+            return DEFAULT_DELAY
+        return history.latency(task, *primary, q=self.quantile)
+
+    def expected_cost(self, task: str, secondary: Tuple[str, str], system_prompt: str, user_content: str) -> float:
+        """Mean cost of the task on the secondary, or a PRICING estimate for this request without history."""
+        expected = history.mean(task, *secondary, "cost")
+        if expected is not None:
+            return expected
+        in_tokens = count_tokens(system_prompt, secondary[1]) + count_tokens(user_content, secondary[1])
+        return estimate_cost(secondary[1], in_tokens, in_tokens * DEFAULT_OUTPUT_RATIO)
+
+    def can_hedge(self, task: str, secondary: Tuple[str, str], system_prompt: str, user_content: str) -> bool:
+        """Checks the secondary is configured and its expected cost fits the caps."""
+        if not available(secondary[0]):
+            return False
+        expected = self.expected_cost(task, secondary, system_prompt, user_content)
+        if self.max_request_cost is not None and expected > self.max_request_cost:
+            return False
+        with self._lock:
+            return self.spent + expected <= self.budget
+
+    def _start(self, task: str, target: Tuple[str, str], system_prompt: str, user_content: str, hedge: bool) -> Future:
+        future = Future()
+        provider, model = target
+
+        def run():
+            try:
+                with span(self.stage, provider=provider, model=model, task=task, hedge=hedge) as s:
+                    content, metrics = complete(provider, model, system_prompt, user_content)
+                    s.set(**metrics)
+                if hedge:
+                    with self._lock:
+                        self.spent += metrics["cost"]
+                    tracer.count("hedge_cost_dollars_total", metrics["cost"], task=task)
+                future.set_result((content, metrics))
+            except Exception as e:
+                future.set_exception(e)
+
+        # Daemon threads so an abandoned request never delays the script's exit
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def run(self, system_prompt: str, user_content: str, task: Optional[str] = None,
+            target: Optional[Tuple[str, str]] = None) -> Tuple[str, Dict[str, float]]:
+        """
+        Returns the first successful (content, metrics); metrics name the winning provider/model.
+        `target` overrides the primary provider/model for this request (e.g. a routed model).
+        """
+        task = task or self.task
+        target = target or self.primary
+        secondary_target = self.secondary or alternate(target[0])
+        primary = self._start(task, target, system_prompt, user_content, hedge=False)
+        done, _ = wait([primary], timeout=self.delay(task, target))
+        if primary in done and primary.exception() is None:
+            return self._result(primary, target, "primary")
+
+        if secondary_target == target or not self.can_hedge(task, secondary_target, system_prompt, user_content):
+            tracer.count("hedges_skipped_total", task=task)
+            return self._result(primary, target, "primary")
+
+        reason = "error" if primary in done else "slow"
+        status = "failed" if reason == "error" else f"exceeded p{int(self.quantile * 100)} latency"
+        print(f"      {target[0]} {status}; hedging with {secondary_target[0]} ({secondary_target[1]})...")
+        tracer.count("hedges_fired_total", task=task, reason=reason)
+        secondary = self._start(task, secondary_target, system_prompt, user_content, hedge=True)
+        targets = {primary: (target, "primary"), secondary: (secondary_target, "secondary")}
+
+        pending = {secondary} if reason == "error" else {primary, secondary}
+        error = primary.exception() if reason == "error" else None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner, role = targets[future]
+                    tracer.count("hedge_wins_total", task=task, winner=role)
+                    return self._result(future, winner, role)
+                error = future.exception()
+        raise error
+
+    def _result(self, future: Future, target: Tuple[str, str], role: str) -> Tuple[str, Dict[str, float]]:
+        content, metrics = future.result()
+        return content, dict(metrics, provider=target[0], model=target[1], winner=role)
+
+def add_arguments(parser):
+    """Adds the hedging options shared by the assessment scripts."""
+    parser.add_argument("--hedge", action="store_true", help="Duplicate slow or failed requests to another provider and keep the first answer")
+    parser.add_argument("--hedge-to", default=None, help="Hedge target as provider[:model] (default: the other provider)")
+    parser.add_argument("--hedge-budget", type=float, default=DEFAULT_BUDGET, help="Maximum extra spend on hedge requests ($)")
+    parser.add_argument("--max-request-cost", type=float, default=None,
+                        help="Do not hedge a request whose hedge is expected to cost more than this ($)")
+
+def from_args(args, task: Optional[str], primary: Tuple[str, str]) -> Optional[HedgePolicy]:
+    """
+    Builds the run's hedge policy (one budget shared by all its requests), or None without
+    --hedge; raises ValueError on an invalid --hedge-to.
+    """
+    if not args.hedge:
+        return None
+    secondary = parse_target(args.hedge_to) if args.hedge_to else None
+    return HedgePolicy(task, primary, secondary, budget=args.hedge_budget, max_request_cost=args.max_request_cost)
@@ -0,0 +1,96 @@
+import os
+import json
+import math
+import time
+import atexit
+import threading
+from typing import Dict, List, Optional
+
+from tracing import tracer, file_lock, TRACE_DIR
+
+HISTORY_FILE = "latency_history.json"
+
+# Samples kept per (task, provider, model); older ones are dropped first
+MAX_SAMPLES = 200
+
+def _key(task: str, provider: str, model: str) -> str:
+    return f"{task}|{provider}|{model}"
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (q in 0..1)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+class LatencyHistory:
+    """
+    Latency and cost samples per task/provider/model, persisted across runs.
+    Fed automatically by every successful span that carries a `task` attribute.
+    """
+
+    def __init__(self, path: str = os.path.join(TRACE_DIR, HISTORY_FILE)):
+        self.path = path
+        self.samples: Dict[str, List[dict]] = self._load()
+        self.new: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List[dict]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, task: str, provider: str, model: str, latency: float, **attributes):
+        """Adds a sample (latency in seconds plus cost/token attributes)."""
+        sample = {"latency": latency, "ts": time.time()}
+        sample.update({k: v for k, v in attributes.items() if isinstance(v, (int, float))})
+        key = _key(task, provider, model)
+        with self._lock:
+            self.samples.setdefault(key, []).append(sample)
+            self.samples[key] = self.samples[key][-MAX_SAMPLES:]
+            self.new.setdefault(key, []).append(sample)
+
+    def on_span(self, span):
+        attrs = span.attributes
+        if span.status != "ok" or not attrs.get("task") or not attrs.get("provider"):
+            return
+        self.record(attrs["task"], attrs["provider"], attrs.get("model", ""), span.duration,
+                    cost=attrs.get("cost", 0.0), in_tokens=attrs.get("in_tokens", 0),
+                    out_tokens=attrs.get("out_tokens", 0), audio_seconds=attrs.get("audio_seconds", 0.0))
+
+    def get(self, task: str, provider: str, model: str) -> List[dict]:
+        with self._lock:
+            return list(self.samples.get(_key(task, provider, model), []))
+
+    def latency(self, task: str, provider: str, model: str, q: float = 0.95) -> Optional[float]:
+        """Latency percentile for a task on one provider/model, or None without samples."""
+        return percentile([s["latency"] for s in self.get(task, provider, model)], q)
+
+    def mean(self, task: str, provider: str, model: str, field: str) -> Optional[float]:
+        samples = [s[field] for s in self.get(task, provider, model) if field in s]
+        return sum(samples) / len(samples) if samples else None
+
+    def save(self):
+        """Merges this run's samples into the history file (other runs may have written since)."""
+        with self._lock:
+            if not self.new:
+                return
+            new, self.new = self.new, {}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with file_lock(self.path):
+            merged = self._load()
+            for key, samples in new.items():
+                merged[key] = (merged.get(key, []) + samples)[-MAX_SAMPLES:]
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.path)
+
+history = LatencyHistory()
+tracer.add_listener(history.on_span)
+atexit.register(history.save)
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import wave
+import socket
+import argparse
+
+# Seconds of audio written per chunk
+DEFAULT_CHUNK = 0.25
+
+def feed(wav_path: str, sink, speed: float = 1.0, chunk_seconds: float = DEFAULT_CHUNK) -> float:
+    """
+    Streams the PCM frames of `wav_path` into `sink(frames)` at `speed` times real time,
+    standing in for a telephony feed. Returns the audio duration in seconds.
+    """
+    with wave.open(wav_path, 'rb') as src:
+        rate = src.getframerate()
+        frames_per_chunk = max(1, int(rate * chunk_seconds))
+        total = src.getnframes()
+        started = time.time()
+        sent = 0
+        while sent < total:
+            frames = src.readframes(frames_per_chunk)
+            if not frames:
+                break
+            sink(frames)
+            sent += frames_per_chunk
+            # Pace against the wall clock so slow sinks do not accumulate drift
+            due = started + (sent / rate) / speed
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        return total / rate
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a WAV file in real time into a growing file or a local socket.")
+    parser.add_argument("wav_path", help="PCM WAV file to replay")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--to-file", default=None, help="Growing WAV file to write (follow it with live_transcribe.py --tail)")
+    target.add_argument("--to-socket", default=None, help="host:port to stream raw PCM to (live_transcribe.py --listen)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed relative to real time")
+    parser.add_argument("--chunk", type=float, default=DEFAULT_CHUNK, help="Seconds of audio per write")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.wav_path):
+        print(f"Error: File '{args.wav_path}' not found.")
+        sys.exit(1)
+
+    start = time.time()
+    if args.to_file:
+        with wave.open(args.wav_path, 'rb') as src:
+            params = src.getparams()
+        with open(args.to_file, 'wb') as handle:
+            out = wave.open(handle, 'wb')
+            out.setparams(params)
+
+            def sink(frames):
+                out.writeframesraw(frames)
+                handle.flush()
+
+            try:
+                duration = feed(args.wav_path, sink, args.speed, args.chunk)
+            finally:
+                out.close()
+    else:
+        host, _, port = args.to_socket.rpartition(":")
+        with socket.create_connection((host or "127.0.0.1", int(port))) as conn:
+            duration = feed(args.wav_path, conn.sendall, args.speed, args.chunk)
+
+    print(f"SUCCESS: Fed {duration:.2f}s of audio in {time.time() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
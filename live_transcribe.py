@@ -0,0 +1,344 @@
+import os
+import io
+import sys
+import json
+import time
+import wave
+import struct
+import socket
+import argparse
+import threading
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+from openai_transcribe import client, identify_speakers, summarize_transcript
+from providers import estimate_cost
+from utils import format_timecode
+from prompt_manager import load_prompt
+from transcript import Segment, Transcript
+from writers import write_outputs, parse_formats, WRITERS
+from search_index import index_transcript
+from history import percentile
+from tracing import span, tracer
+
+# Seconds of new audio that trigger a new transcription of the open window
+DEFAULT_STEP = 5.0
+
+# Segments ending closer than this to the live edge are still partial
+DEFAULT_HOLDBACK = 2.0
+
+# Longest open window sent to Whisper; older audio is force-finalized
+DEFAULT_MAX_WINDOW = 30.0
+
+# End of call when no audio arrives for this long
+DEFAULT_IDLE = 5.0
+
+# A window whose transcription failed is resent after this delay; at the end of the call it is tried this often
+RETRY_DELAY = 2.0
+FINAL_ATTEMPTS = 3
+
+class PcmBuffer:
+    """Growing PCM buffer that remembers when each byte arrived (for latency)."""
+
+    def __init__(self, rate: int = 16000, channels: int = 1, sample_width: int = 2):
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.data = bytearray()
+        self.arrivals: List[Tuple[int, float]] = []
+        self.closed = False
+        self.lock = threading.Lock()
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def seconds(self) -> float:
+        with self.lock:
+            return len(self.data) / (self.frame_size * self.rate)
+
+    def append(self, chunk: bytes):
+        with self.lock:
+            self.data.extend(chunk)
+            self.arrivals.append((len(self.data), time.time()))
+
+    def close(self):
+        self.closed = True
+
+    def arrival_time(self, seconds: float) -> float:
+        """Wall time at which audio up to `seconds` had been received."""
+        offset = int(seconds * self.rate) * self.frame_size
+        with self.lock:
+            i = bisect_left(self.arrivals, (offset,))
+            if i < len(self.arrivals):
+                return self.arrivals[i][1]
+            return self.arrivals[-1][1] if self.arrivals else time.time()
+
+    def wav_bytes(self, start: float, end: float) -> bytes:
+        """Encodes [start, end) seconds as an in-memory WAV file."""
+        first = int(start * self.rate) * self.frame_size
+        last = int(end * self.rate) * self.frame_size
+        with self.lock:
+            frames = bytes(self.data[first:last])
+        out = io.BytesIO()
+        with wave.open(out, 'wb') as w:
+            w.setnchannels(self.channels)
+            w.setsampwidth(self.sample_width)
+            w.setframerate(self.rate)
+            w.writeframes(frames)
+        return out.getvalue()
+
+def read_wav_header(f) -> Optional[Tuple[int, int, int, int]]:
+    """Parses a (possibly still growing) WAV header: (rate, channels, sample_width, data_offset)."""
+    f.seek(0)
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    fmt = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"fmt ":
+            body = f.read(size)
+            if len(body) < 16:
+                # The fmt chunk is still being written
+                return None
+            audio_format, channels, rate = struct.unpack("<HHI", body[:8])
+            bits = struct.unpack("<H", body[14:16])[0]
+            if audio_format != 1:
+                raise ValueError("Only PCM WAV is supported for live transcription.")
+            fmt = (rate, channels, bits // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            return fmt + (f.tell(),)
+        else:
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+def tail_file(path: str, buffer: PcmBuffer, idle: float, raw: bool = False):
+    """Feeds a growing WAV (or raw PCM) file into `buffer` until it stops growing."""
+    started = time.time()
+    while not os.path.exists(path):
+        if time.time() - started > idle:
+            print(f"Warning: '{path}' did not appear within {idle:g}s.")
+            buffer.close()
+            return
+        time.sleep(0.1)
+    with open(path, 'rb') as f:
+        offset = 0
+        if not raw:
+            started = time.time()
+            header = read_wav_header(f)
+            while header is None:
+                if time.time() - started > idle:
+                    buffer.close()
+                    return
+                time.sleep(0.1)
+                header = read_wav_header(f)
+            buffer.rate, buffer.channels, buffer.sample_width, offset = header
+        f.seek(offset)
+        last_data = time.time()
+        while True:
+            chunk = f.read(65536)
+            if chunk:
+                buffer.append(chunk)
+                last_data = time.time()
+            elif time.time() - last_data > idle:
+                break
+            else:
+                time.sleep(0.05)
+    buffer.close()
+
+def listen_socket(address: str, buffer: PcmBuffer, idle: float):
+    """Accepts one connection on host:port and feeds its raw PCM into `buffer` until it closes."""
+    host, _, port = address.rpartition(":")
+    with socket.create_server((host or "127.0.0.1", int(port))) as server:
+        print(f"      Listening for audio on {host or '127.0.0.1'}:{port}...")
+        conn, _ = server.accept()
+        with conn:
+            conn.settimeout(idle)
+            try:
+                while True:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    buffer.append(chunk)
+            except socket.timeout:
+                pass
+    buffer.close()
+
+class LiveTranscriber:
+    """
+    Transcribes the open (not yet finalized) window of a growing buffer every `step`
+    seconds of new audio. Segments that end at least `holdback` seconds before the live
+    edge are finalized and never re-emitted; timecodes are absolute within the call.
+    """
+
+    def __init__(self, buffer: PcmBuffer, events_path: str, step: float = DEFAULT_STEP,
+                 holdback: float = DEFAULT_HOLDBACK, max_window: float = DEFAULT_MAX_WINDOW):
+        self.buffer = buffer
+        self.step = step
+        self.holdback = holdback
+        self.max_window = max_window
+        self.events = open(events_path, 'w', encoding='utf-8')
+        self.prompt = load_prompt("transcription", "darija_transcription")
+        self.finalized_until = 0.0
+        self.transcribed_until = 0.0
+        self.final: List[Segment] = []
+        self.latencies: List[float] = []
+        self.cost = 0.0
+        # Consecutive failed transcriptions of the open window
+        self.errors = 0
+
+    def _transcribe(self, start: float, end: float) -> List[Segment]:
+        audio = self.buffer.wav_bytes(start, end)
+        # Previous finalized text keeps spelling consistent across windows
+        context = " ".join(seg.text for seg in self.final[-3:])
+        cost = estimate_cost("whisper-1", audio_seconds=end - start)
+        with span("live_window", provider="openai", model="whisper-1", task="live_transcription",
+                  audio_seconds=end - start, file_size=len(audio), cost=cost):
+            response = client.audio.transcriptions.create(
+                model="whisper-1",
+                file=("window.wav", audio),
+                response_format="verbose_json",
+                prompt=f"{self.prompt}\n{context}".strip()
+            )
+        self.cost += cost
+        return [Segment(start + s.start, min(start + s.end, end), None, s.text.strip()) for s in response.segments]
+
+    def _emit(self, kind: str, seg: Segment):
+        now = time.time()
+        latency = now - self.buffer.arrival_time(seg.end)
+        if kind == "final":
+            self.latencies.append(latency)
+            tracer.observe("live_final_latency_seconds", latency)
+        self.events.write(json.dumps({
+            "type": kind, "start": round(seg.start, 3), "end": round(seg.end, 3),
+            "text": seg.text, "latency": round(latency, 3), "ts": now,
+        }, ensure_ascii=False) + "\n")
+        self.events.flush()
+        marker = "FINAL  " if kind == "final" else "partial"
+        print(f"{marker} {format_timecode(seg.start)} {seg.text}")
+
+    def poll(self, final: bool = False) -> bool:
+        """Transcribes the open window if enough new audio arrived; returns True if it ran."""
+        edge = self.buffer.seconds
+        backlog = edge - self.finalized_until > self.max_window
+        if edge - self.finalized_until < 0.5 or (not final and not backlog and edge - self.transcribed_until < self.step):
+            return False
+        end = edge
+        if backlog:
+            # Nothing settled within a full window: finalize it whole instead of letting it grow
+            end, final = self.finalized_until + self.max_window, True
+        try:
+            segments = self._transcribe(self.finalized_until, end)
+        except Exception as e:
+            # Keep the window open: the next poll sends it again
+            self.errors += 1
+            self.events.write(json.dumps({
+                "type": "error", "start": round(self.finalized_until, 3), "end": round(end, 3),
+                "error": f"{type(e).__name__}: {e}", "ts": time.time(),
+            }, ensure_ascii=False) + "\n")
+            self.events.flush()
+            print(f"Warning: Transcription of {format_timecode(self.finalized_until)}-{format_timecode(end)} failed ({e}); retrying.")
+            return False
+        self.errors = 0
+        self.transcribed_until = end
+        for seg in segments:
+            if not seg.text:
+                continue
+            if final or seg.end <= end - self.holdback:
+                self.final.append(seg)
+                self.finalized_until = seg.end
+                self._emit("final", seg)
+            else:
+                self._emit("partial", seg)
+        if final:
+            self.finalized_until = end
+        return True
+
+    def run(self) -> Transcript:
+        """Polls until the source closes, then finalizes the remaining audio."""
+        while not self.buffer.closed:
+            if not self.poll():
+                time.sleep(RETRY_DELAY if self.errors else 0.2)
+        self.errors = 0
+        while self.poll(final=True) or 0 < self.errors < FINAL_ATTEMPTS:
+            if self.errors:
+                time.sleep(RETRY_DELAY)
+        if self.errors:
+            print(f"Warning: Audio after {format_timecode(self.finalized_until)} could not be transcribed.")
+        self.events.close()
+        return Transcript.from_segments(self.final)
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a live call from a growing audio file or a local socket.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tail", default=None, help="Growing PCM WAV (or raw PCM with --raw) file to follow")
+    source.add_argument("--listen", default=None, help="host:port to accept one raw PCM stream on")
+    parser.add_argument("--raw", action="store_true", help="Tailed file is raw PCM without a WAV header")
+    parser.add_argument("--rate", type=int, default=16000, help="Sample rate of raw PCM input")
+    parser.add_argument("--channels", type=int, default=1, help="Channels of raw PCM input")
+    parser.add_argument("--sample-width", type=int, default=2, help="Bytes per sample of raw PCM input")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP, help="Seconds of new audio between transcriptions")
+    parser.add_argument("--holdback", type=float, default=DEFAULT_HOLDBACK, help="Seconds before the live edge kept partial")
+    parser.add_argument("--idle", type=float, default=DEFAULT_IDLE, help="Seconds without audio that end the call")
+    parser.add_argument("--name", default=None, help="Base name for outputs (default: tailed file name or 'live_call')")
+    parser.add_argument("--formats", "-f", default="docx",
+                        help=f"Comma-separated output formats written at call end ({','.join(WRITERS)})")
+
+    args = parser.parse_args()
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if not os.getenv("OPENAI_API_KEY"):
+        print("Error: OPENAI_API_KEY not found.")
+        sys.exit(1)
+
+    os.makedirs("outputs", exist_ok=True)
+    name = args.name or (os.path.splitext(os.path.basename(args.tail))[0] if args.tail else f"live_call_{int(time.time())}")
+    events_path = os.path.join("outputs", f"{name}_live.jsonl")
+
+    buffer = PcmBuffer(args.rate, args.channels, args.sample_width)
+    if args.tail:
+        reader = threading.Thread(target=tail_file, args=(args.tail, buffer, args.idle, args.raw), daemon=True)
+    else:
+        reader = threading.Thread(target=listen_socket, args=(args.listen, buffer, args.idle), daemon=True)
+    reader.start()
+
+    total_start = time.time()
+    print(f"\n[1/3] Live transcription (events in {events_path})...")
+    live = LiveTranscriber(buffer, events_path, args.step, args.holdback)
+    segments = live.run()
+
+    if not len(segments):
+        print("Error: No speech was transcribed. Stopping.")
+        sys.exit(1)
+
+    text_dialogue, time_d, cost_d = identify_speakers(segments)
+    summary, time_s, cost_s = summarize_transcript(text_dialogue)
+    dialogue = Transcript.from_text(text_dialogue, segments.duration, timings=segments)
+    written = write_outputs(dialogue, summary, os.path.join("outputs", f"{name}_live"),
+                            'Conversation Summary & Transcript', formats)
+    index_transcript(written[0], dialogue)
+
+    total_time = time.time() - total_start
+    p50 = percentile(live.latencies, 0.5) or 0.0
+    p95 = percentile(live.latencies, 0.95) or 0.0
+    print("-" * 40)
+    print(f"SUCCESS: Report saved to {', '.join(written)}")
+    print("-" * 40)
+    print(f"{'Audio':<20} | {buffer.seconds:>8.2f}s")
+    print(f"{'Final latency p50':<20} | {p50:>8.2f}s")
+    print(f"{'Final latency p95':<20} | {p95:>8.2f}s")
+    print(f"{'TOTAL':<20} | {total_time:>8.2f}s | ${live.cost + cost_d + cost_s:.4f}")
+    print("-" * 40)
+
+if __name__ == "__main__":
+    main()
@@ -2,54 +2,40 @@ import os
 import sys
 import argparse
 import time
-from typing import Tuple, Dict
-from openai import OpenAI
+from typing import Tuple, Optional
 from dotenv import load_dotenv
-import tiktoken
 
 from utils import read_docx, save_json, clean_markdown
-from prompt_manager import load_prompt
+from prompt_manager import load_prompt, prompt_path
+from tracing import span
+import hedging
+from hedging import HedgePolicy
+from dedup import DedupIndex, assessment_kind, minhash, reuse_outputs
+from providers import complete, count_tokens, DEFAULT_MODELS
+from router import BudgetExceeded, add_arguments, from_args
+from stages import StageStore, stage_inputs
 
 # Load environmental variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+TASK = "agent_assessment"
+PROVIDER = "openai"
 
-# Pricing constants
-PRICING = {
-    "gpt-4o": {
-        "input": 0.0025 / 1000,
-        "output": 0.010 / 1000
-    }
-}
-
-def calculate_gpt_cost(prompt: str, completion: str) -> Dict[str, float]:
-    try:
-        encoding = tiktoken.encoding_for_model("gpt-4o")
-        in_tokens = len(encoding.encode(prompt))
-        out_tokens = len(encoding.encode(completion))
-        cost = (in_tokens * PRICING["gpt-4o"]["input"]) + (out_tokens * PRICING["gpt-4o"]["output"])
-        return {"cost": cost, "in_tokens": in_tokens, "out_tokens": out_tokens}
-    except Exception:
-        return {"cost": 0.0, "in_tokens": 0, "out_tokens": 0}
-
-def assess_agent_performance(transcript_text: str) -> Tuple[str, float, float]:
+def assess_agent_performance(transcript_text: str, model: str = DEFAULT_MODELS[PROVIDER],
+                             hedge: Optional[HedgePolicy] = None) -> Tuple[str, float, float]:
     """Generates summary and agent assessment using OpenAI GPT-4o."""
     start_time = time.time()
     print("[1/2] Analyzing conversation and assessing agent...")
     
     try:
         system_prompt = load_prompt("agent_assessment", "qa_expert")
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyze this transcript:\n\n{transcript_text}"}
-            ]
-        )
-        content = response.choices[0].message.content
-        metrics = calculate_gpt_cost(system_prompt + transcript_text, content)
+        user_content = f"Analyze this transcript:\n\n{transcript_text}"
+        if hedge is not None:
+            content, metrics = hedge.run(system_prompt, user_content, target=(PROVIDER, model))
+        else:
+            with span("assessment", provider=PROVIDER, model=model, task=TASK) as s:
+                content, metrics = complete(PROVIDER, model, system_prompt, user_content)
+                s.set(**metrics)
         elapsed = time.time() - start_time
         return content, elapsed, metrics["cost"]
     except Exception as e:
@@ -60,6 +46,10 @@ def main():
     parser = argparse.ArgumentParser(description="Assess call agent performance from a transcript using OpenAI.")
     parser.add_argument("docx_path", help="Path to the transcribed .docx file")
     parser.add_argument("--output", "-o", default=None, help="Output Word file path")
+    hedging.add_arguments(parser)
+    add_arguments(parser)
+    parser.add_argument("--no-dedup", action="store_true", help="Assess the transcript even if it duplicates an earlier one")
+    parser.add_argument("--force", action="store_true", help="Assess even if the outputs are up to date (implies --no-dedup)")
     
     args = parser.parse_args()
     
@@ -76,10 +66,34 @@ def main():
         if not os.path.dirname(args.output):
             args.output = os.path.join("outputs", args.output)
 
+    docx_output = args.output.replace('.json', '.docx')
+    # A run skipped as up to date still uses up its item of the batch (see router.from_args)
+    try:
+        router = from_args(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    stages = StageStore()
+    inputs = stage_inputs({"transcript": args.docx_path, "prompt": prompt_path("agent_assessment", "qa_expert")},
+                          model=DEFAULT_MODELS[PROVIDER])
+    # An assessment from a degraded model is redone once the batch can afford the configured one
+    preferred_fits = lambda: router.preferred_fits(
+        TASK, PROVIDER, in_tokens=count_tokens(read_docx(args.docx_path), DEFAULT_MODELS[PROVIDER]))
+    if stages.up_to_date(TASK, [args.output, docx_output], inputs, args.force, preferred_fits):
+        print(f"SUCCESS: {args.output} and {docx_output} up to date (transcript, prompt and model unchanged).")
+        sys.exit(0)
+
     if not os.getenv("OPENAI_API_KEY"):
         print("Error: OPENAI_API_KEY not found.")
         sys.exit(1)
 
+    try:
+        hedge = hedging.from_args(args, TASK, (PROVIDER, DEFAULT_MODELS[PROVIDER]))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     total_start = time.time()
     transcript_text = read_docx(args.docx_path)
     
@@ -87,7 +101,23 @@ def main():
         print("Error: The transcription document is empty. Stopping.")
         sys.exit(1)
 
-    analysis, a_time, a_cost = assess_agent_performance(transcript_text)
+    dedup = DedupIndex()
+    kind = assessment_kind(TASK, PROVIDER, inputs)
+    signature = minhash(transcript_text)
+    match = dedup.find_transcript(signature, kind, args.docx_path)
+    if match and not (args.no_dedup or args.force) and reuse_outputs(match, [args.output, docx_output]):
+        stages.record(TASK, [args.output, docx_output], inputs)
+        print(f"SUCCESS: Transcript duplicates '{match['path']}' ({match['similarity']:.0%} similar); "
+              f"reused {args.output} and {docx_output}")
+        sys.exit(0)
+
+    try:
+        route = router.choose(TASK, PROVIDER, in_tokens=count_tokens(transcript_text, DEFAULT_MODELS[PROVIDER]))
+    except BudgetExceeded as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    analysis, a_time, a_cost = assess_agent_performance(transcript_text, route.model, hedge)
     
     # Clean and parse JSON
     json_text = clean_markdown(analysis)
@@ -99,10 +129,11 @@ def main():
         save_json(json_text, args.output)
         
         # Save Docx (replace .json with .docx in path)
-        docx_output = args.output.replace('.json', '.docx')
         from utils import save_assessment_docx
         save_assessment_docx(data, docx_output)
         
+        dedup.add_transcript(signature, kind, args.docx_path, [args.output, docx_output])
+        stages.record(TASK, [args.output, docx_output], inputs, route.model)
         success_msg = f"Assessment saved to {args.output} and {docx_output}"
     except Exception as e:
         print(f"Warning: Could not parse assessment as JSON for Docx generation: {e}")
@@ -2,68 +2,57 @@ import os
 import sys
 import argparse
 import time
-from typing import Tuple, Dict
-from openai import OpenAI
+from typing import Tuple
 from dotenv import load_dotenv
-import tiktoken
 
-from utils import get_audio_duration, format_timecode, save_docx
-from prompt_manager import load_prompt
+from utils import get_audio_duration
+from prompt_manager import load_prompt, prompt_path
+from tracing import span
+from writers import write_outputs, parse_formats, WRITERS
+from dedup import DedupIndex, reuse_outputs
+from search_index import index_transcript
+from transcript import Transcript
+from providers import openai_client, complete, count_tokens, estimate_cost, OPENAI_MODEL
+from router import BudgetExceeded, add_arguments, from_args, SPEECH_TOKENS_PER_SECOND
+from stages import StageStore, stage_inputs
 
 # Load environmental variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared OpenAI client
+client = openai_client()
 
-# Pricing constants
-PRICING = {
-    "whisper": 0.006,  # $0.006 per minute
-    "gpt-4o": {
-        "input": 0.0025 / 1000,
-        "output": 0.010 / 1000
-    }
-}
-
-def calculate_gpt_cost(prompt: str, completion: str) -> Dict[str, float]:
-    try:
-        encoding = tiktoken.encoding_for_model("gpt-4o")
-        in_tokens = len(encoding.encode(prompt))
-        out_tokens = len(encoding.encode(completion))
-        cost = (in_tokens * PRICING["gpt-4o"]["input"]) + (out_tokens * PRICING["gpt-4o"]["output"])
-        return {"cost": cost, "in_tokens": in_tokens, "out_tokens": out_tokens}
-    except Exception:
-        return {"cost": 0.0, "in_tokens": 0, "out_tokens": 0}
-
-def transcribe_audio(audio_file_path: str) -> Tuple[list, float, float]:
+def transcribe_audio(audio_file_path: str) -> Tuple[Transcript, float, float]:
     start_time = time.time()
     audio_duration = get_audio_duration(audio_file_path)
-    whisper_cost = (audio_duration / 60.0) * PRICING["whisper"]
+    whisper_cost = estimate_cost("whisper-1", audio_seconds=audio_duration)
     
     print(f"\n[1/3] Transcribing: {os.path.basename(audio_file_path)}...")
     darija_prompt = load_prompt("transcription", "darija_transcription")
     
     try:
-        with open(audio_file_path, "rb") as audio_file:
-            response = client.audio.transcriptions.create(
-                model="whisper-1", 
-                file=audio_file,
-                response_format="verbose_json",
-                prompt=darija_prompt
-            )
+        with span("transcription", provider="openai", model="whisper-1", task="transcription",
+                  file_size=os.path.getsize(audio_file_path), audio_seconds=audio_duration, cost=whisper_cost) as s:
+            with open(audio_file_path, "rb") as audio_file:
+                response = client.audio.transcriptions.create(
+                    model="whisper-1", 
+                    file=audio_file,
+                    response_format="verbose_json",
+                    prompt=darija_prompt
+                )
+            segments = Transcript.from_whisper_segments(response.segments)
+            s.set(segments=len(segments))
         elapsed = time.time() - start_time
-        return response.segments, elapsed, whisper_cost
+        return segments, elapsed, whisper_cost
     except Exception as e:
         print(f"Error during transcription: {e}")
         sys.exit(1)
 
-def identify_speakers(segments: list) -> Tuple[str, float, float]:
+def identify_speakers(segments: Transcript, model: str = OPENAI_MODEL) -> Tuple[str, float, float]:
     start_time = time.time()
     print("[2/3] Identifying speakers and formatting dialogue...")
     
-    raw_text_with_times = ""
-    for s in segments:
-        raw_text_with_times += f"{format_timecode(s.start)} {s.text}\n"
+    raw_text_with_times = segments.render(speakers=False)
 
     system_prompt = """You are an expert at analyzing interview transcripts. 
 Your task is to take a transcript with timestamps and assign generic speaker labels (Speaker A, Speaker B, etc.).
@@ -73,36 +62,25 @@ Rules:
 3. Maintain original language and spelling. Do not translate."""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Please identify speakers and format this transcript:\n\n{raw_text_with_times}"}
-            ]
-        )
-        content = response.choices[0].message.content
-        metrics = calculate_gpt_cost(system_prompt + raw_text_with_times, content)
+        with span("diarization", provider="openai", model=model, task="diarization", segments=len(segments)) as s:
+            content, metrics = complete("openai", model, system_prompt,
+                                        f"Please identify speakers and format this transcript:\n\n{raw_text_with_times}")
+            s.set(**metrics)
         elapsed = time.time() - start_time
         return content, elapsed, metrics["cost"]
     except Exception as e:
         print(f"Error during speaker identification: {e}")
         sys.exit(1)
 
-def summarize_transcript(transcript: str) -> Tuple[str, float, float]:
+def summarize_transcript(transcript: str, model: str = OPENAI_MODEL) -> Tuple[str, float, float]:
     start_time = time.time()
     print("[3/3] Generating summary...")
     system_prompt = "You are a helpful assistant that summarizes conversations between a 'Call Agent' and 'Xplorer'."
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": transcript}
-            ]
-        )
-        content = response.choices[0].message.content
-        metrics = calculate_gpt_cost(system_prompt + transcript, content)
+        with span("summary", provider="openai", model=model, task="summary") as s:
+            content, metrics = complete("openai", model, system_prompt, transcript)
+            s.set(**metrics)
         elapsed = time.time() - start_time
         return content, elapsed, metrics["cost"]
     except Exception as e:
@@ -113,8 +91,18 @@ def main():
     parser = argparse.ArgumentParser(description="Transcribe and summarize audio files with cost tracking.")
     parser.add_argument("audio_path", help="Path to the audio file")
     parser.add_argument("--output", "-o", default=None, help="Output Word file path")
+    parser.add_argument("--formats", "-f", default="docx",
+                        help=f"Comma-separated output formats ({','.join(WRITERS)}); other formats share the output's base name")
+    add_arguments(parser)
+    parser.add_argument("--no-dedup", action="store_true", help="Process the file even if it duplicates an earlier recording")
+    parser.add_argument("--force", action="store_true", help="Transcribe even if the outputs are up to date (implies --no-dedup)")
     
     args = parser.parse_args()
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     
     if not os.path.exists(args.audio_path):
         print(f"Error: File '{args.audio_path}' not found.")
@@ -129,21 +117,67 @@ def main():
         if not os.path.dirname(args.output):
             args.output = os.path.join("outputs", args.output)
 
+    output_base = os.path.splitext(args.output)[0]
+    targets = [output_base + WRITERS[f].extension for f in formats]
+    # A run skipped as up to date still uses up its item of the batch (see router.from_args)
+    try:
+        router = from_args(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    stages = StageStore()
+    # Whisper, then the diarization and summary models
+    inputs = stage_inputs({"audio": args.audio_path, "prompt": prompt_path("transcription", "darija_transcription")},
+                          model=f"whisper-1/{OPENAI_MODEL}/{OPENAI_MODEL}")
+    def preferred_fits() -> bool:
+        # Before transcribing, the transcript's size is estimated from the audio
+        tokens = int(get_audio_duration(args.audio_path) * SPEECH_TOKENS_PER_SECOND)
+        return all(router.preferred_fits(task, "openai", in_tokens=tokens) for task in ("diarization", "summary"))
+    if stages.up_to_date("transcription", targets, inputs, args.force, preferred_fits):
+        print(f"SUCCESS: {', '.join(targets)} up to date (audio, prompt and models unchanged).")
+        sys.exit(0)
+
     if not os.getenv("OPENAI_API_KEY"):
         print("Error: OPENAI_API_KEY not found.")
         sys.exit(1)
 
+    dedup = DedupIndex()
+    duration = get_audio_duration(args.audio_path)
+    match, audio_key = dedup.find_audio(args.audio_path, duration)
+    if match and not (args.no_dedup or args.force):
+        if reuse_outputs(match, targets):
+            stages.record("transcription", targets, inputs)
+            print(f"SUCCESS: '{args.audio_path}' duplicates '{match['path']}' ({match['match']} match, "
+                  f"{match['similarity']:.0%}); reused {', '.join(targets)}")
+            sys.exit(0)
+        print(f"Warning: '{args.audio_path}' duplicates '{match['path']}' but its outputs cannot be reused; reprocessing.")
+
     total_start = time.time()
-    segments, time_t, cost_t = transcribe_audio(args.audio_path)
-    text_dialogue, time_d, cost_d = identify_speakers(segments)
-    summary, time_s, cost_s = summarize_transcript(text_dialogue)
-    save_docx(text_dialogue, summary, args.output, 'Conversation Summary & Transcript')
+    try:
+        router.check()
+        segments, time_t, cost_t = transcribe_audio(args.audio_path)
+        raw_tokens = count_tokens(segments.render(speakers=False), OPENAI_MODEL)
+        diarization_model = router.choose("diarization", "openai", raw_tokens).model
+        text_dialogue, time_d, cost_d = identify_speakers(segments, diarization_model)
+        summary_tokens = count_tokens(text_dialogue, OPENAI_MODEL)
+        summary_model = router.choose("summary", "openai", summary_tokens).model
+        summary, time_s, cost_s = summarize_transcript(text_dialogue, summary_model)
+    except BudgetExceeded as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    # Keep Whisper's sub-second timings when the diarized lines map one-to-one onto its segments
+    dialogue = Transcript.from_text(text_dialogue, segments.duration, timings=segments)
+    written = write_outputs(dialogue, summary, output_base, 'Conversation Summary & Transcript', formats)
+    index_transcript(written[0], dialogue)
+    dedup.add_audio(audio_key, args.audio_path, duration, written)
+    stages.record("transcription", written, inputs, f"whisper-1/{diarization_model}/{summary_model}")
     
     total_time = time.time() - total_start
     total_cost = cost_t + cost_d + cost_s
 
     print("-" * 40)
-    print(f"SUCCESS: Report saved to {args.output}")
+    print(f"SUCCESS: Report saved to {', '.join(written)}")
     print("-" * 40)
     print(f"{'Step':<20} | {'Time':<10} | {'Cost'}")
     print("-" * 40)
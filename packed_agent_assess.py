@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from utils import read_docx, save_json, clean_markdown, save_assessment_docx
+from prompt_manager import load_prompt, prompt_path
+from tracing import span, tracer
+from dedup import DedupIndex, assessment_kind, minhash, reuse_outputs
+from providers import complete, count_tokens, available, DEFAULT_MODELS, API_KEYS
+from router import BudgetExceeded, add_arguments, from_args
+from search_index import iter_transcript_files
+from stages import StageStore, stage_inputs
+
+# Load environmental variables from .env file
+load_dotenv()
+
+TASK = "agent_assessment"
+PACKED_TASK = "agent_assessment_packed"
+
+# Transcript tokens per packed request, and the longest transcript that is packed at all
+DEFAULT_PACK_TOKENS = 12000
+DEFAULT_SHORT_CALL_TOKENS = 3000
+
+# Keeps the answer (one object per call) well inside the models' output limits
+MAX_CALLS_PER_PACK = 10
+
+VERDICTS = {"Excellent", "Good", "Average", "Poor"}
+CRITERIA = (
+    "professionalism_and_tone",
+    "clarity_of_information",
+    "problem_solving_and_helpfulness",
+    "respect_for_xplorer",
+    "overall_effectiveness",
+)
+
+PACK_INSTRUCTIONS = """---
+
+MULTIPLE TRANSCRIPTS
+
+This request contains several independent call transcripts, each introduced by a line
+"=== CALL <call_id> ===". Assess each call on its own, applying all of the rules above.
+
+Return ONLY a JSON array with exactly one object per call, in the same order as the calls.
+Each object must match the JSON output schema above plus one extra key:
+  "call_id": the <call_id> of the call it assesses."""
+
+def output_paths(path: str) -> List[str]:
+    """The assessment JSON and .docx written for a transcript, as in the agent scripts."""
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    json_path = os.path.join("outputs", f"{base_name}_assessment.json")
+    return [json_path, json_path.replace('.json', '.docx')]
+
+class Call:
+    """A transcript to assess and where its outputs go."""
+
+    def __init__(self, path: str, text: str, model: str):
+        self.path = path
+        self.text = text
+        self.tokens = count_tokens(text, model)
+        self.json_path, self.docx_path = output_paths(path)
+        self.signature = minhash(text)
+
+def validate_assessment(data) -> Optional[str]:
+    """Returns why `data` does not match the qa_expert schema, or None if it does."""
+    if not isinstance(data, dict):
+        return "not an object"
+    if not isinstance(data.get("call_summary"), str) or not data["call_summary"].strip():
+        return "missing call_summary"
+    performance = data.get("agent_performance")
+    if not isinstance(performance, dict):
+        return "missing agent_performance"
+    for criterion in CRITERIA:
+        if performance.get(criterion) not in VERDICTS:
+            return f"invalid agent_performance.{criterion}"
+    if data.get("final_verdict") not in VERDICTS:
+        return "invalid final_verdict"
+    return None
+
+def pack_calls(calls: List[Call], pack_tokens: int, short_call_tokens: int) -> Tuple[List[List[Call]], List[Call]]:
+    """
+    Groups short calls into packs of at most `pack_tokens` transcript tokens (first fit,
+    longest first). Returns the packs and the calls too long to pack.
+    """
+    packs: List[List[Call]] = []
+    loads: List[int] = []
+    single = [c for c in calls if c.tokens > short_call_tokens]
+    for call in sorted((c for c in calls if c.tokens <= short_call_tokens), key=lambda c: -c.tokens):
+        for i, pack in enumerate(packs):
+            if loads[i] + call.tokens <= pack_tokens and len(pack) < MAX_CALLS_PER_PACK:
+                pack.append(call)
+                loads[i] += call.tokens
+                break
+        else:
+            packs.append([call])
+            loads.append(call.tokens)
+    # A pack of one is an ordinary single call
+    single += [pack[0] for pack in packs if len(pack) == 1]
+    return [pack for pack in packs if len(pack) > 1], single
+
+def build_packed_request(system_prompt: str, pack: List[Call]) -> Tuple[str, str, Dict[str, Call]]:
+    """Returns the packed (system prompt, user content) and the call for each call_id."""
+    keyed = {f"c{i + 1}": call for i, call in enumerate(pack)}
+    user_content = "\n\n".join(f"=== CALL {call_id} ===\n{call.text}" for call_id, call in keyed.items())
+    return f"{system_prompt}\n\n{PACK_INSTRUCTIONS}", user_content, keyed
+
+def split_packed_response(content: str, keyed: Dict[str, Call]) -> Tuple[Dict[str, dict], Dict[str, str]]:
+    """Parses the returned array into valid assessments per call_id and errors for the rest."""
+    text = clean_markdown(content)
+    try:
+        items = json.loads(text[text.index("["):text.rindex("]") + 1])
+    except ValueError as e:
+        return {}, {call_id: f"response is not a JSON array ({e})" for call_id in keyed}
+
+    results: Dict[str, dict] = {}
+    errors: Dict[str, str] = {}
+    for item in items if isinstance(items, list) else []:
+        call_id = item.pop("call_id", None) if isinstance(item, dict) else None
+        if call_id not in keyed or call_id in results:
+            continue
+        error = validate_assessment(item)
+        if error:
+            errors[call_id] = error
+        else:
+            results[call_id] = item
+    for call_id in keyed:
+        if call_id not in results:
+            errors.setdefault(call_id, "missing from response")
+    return results, errors
+
+def assess_pack(provider: str, model: str, system_prompt: str, pack: List[Call]) -> Tuple[Dict[str, dict], List[Call], float]:
+    """Runs one packed request; returns assessments by path, the calls to retry singly, and the cost."""
+    packed_prompt, user_content, keyed = build_packed_request(system_prompt, pack)
+    print(f"      Packed request: {len(pack)} calls, {sum(c.tokens for c in pack)} transcript tokens...")
+    try:
+        with span("assessment", provider=provider, model=model, task=PACKED_TASK, calls=len(pack)) as s:
+            content, metrics = complete(provider, model, packed_prompt, user_content)
+            s.set(**metrics)
+    except Exception as e:
+        print(f"Warning: Packed request failed ({e}); assessing its {len(pack)} calls one by one.")
+        return {}, list(pack), 0.0
+
+    results, errors = split_packed_response(content, keyed)
+    for call_id, error in errors.items():
+        print(f"Warning: {os.path.basename(keyed[call_id].path)}: {error}; falling back to a single request.")
+    tracer.count("packed_calls_total", len(results), result="ok")
+    tracer.count("packed_calls_total", len(errors), result="fallback")
+    return {keyed[call_id].path: data for call_id, data in results.items()}, [keyed[call_id] for call_id in errors], metrics["cost"]
+
+def assess_single(provider: str, model: str, system_prompt: str, call: Call) -> Tuple[Optional[dict], float]:
+    """Assesses one call on its own, as the agent scripts do; None if the request or JSON parsing fails."""
+    user_content = f"Analyze this transcript:\n\n{call.text}"
+    try:
+        with span("assessment", provider=provider, model=model, task=TASK) as s:
+            content, metrics = complete(provider, model, system_prompt, user_content)
+            s.set(**metrics)
+        data = json.loads(clean_markdown(content))
+    except Exception as e:
+        print(f"Warning: {os.path.basename(call.path)}: assessment failed ({e}).")
+        return None, 0.0
+    error = validate_assessment(data)
+    if error:
+        print(f"Warning: {os.path.basename(call.path)}: {error}; only its JSON is saved.")
+    return data, metrics["cost"]
+
+def save_outputs(call: Call, data) -> List[str]:
+    """Writes the JSON and Word outputs; an answer that does not match the schema only gets its JSON."""
+    save_json(json.dumps(data, ensure_ascii=False, indent=2), call.json_path)
+    if validate_assessment(data):
+        return [call.json_path]
+    save_assessment_docx(data, call.docx_path)
+    return [call.json_path, call.docx_path]
+
+def main():
+    parser = argparse.ArgumentParser(description="Assess many short calls with several transcripts per request.")
+    parser.add_argument("paths", nargs="+", help="Transcribed .docx files or directories")
+    parser.add_argument("--provider", default="openai", choices=sorted(DEFAULT_MODELS), help="Provider to use")
+    parser.add_argument("--pack-tokens", type=int, default=DEFAULT_PACK_TOKENS, help="Transcript tokens per packed request")
+    parser.add_argument("--short-call-tokens", type=int, default=DEFAULT_SHORT_CALL_TOKENS,
+                        help="Longer transcripts are assessed one per request")
+    add_arguments(parser)
+    parser.add_argument("--no-dedup", action="store_true", help="Assess transcripts even if they duplicate earlier ones")
+    parser.add_argument("--force", action="store_true", help="Assess transcripts even if their outputs are up to date (implies --no-dedup)")
+
+    args = parser.parse_args()
+    provider = args.provider
+
+    if not available(provider):
+        print(f"Error: {API_KEYS[provider]} not found.")
+        sys.exit(1)
+
+    try:
+        router = from_args(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    os.makedirs("outputs", exist_ok=True)
+    total_start = time.time()
+    system_prompt = load_prompt("agent_assessment", "qa_expert")
+    dedup = DedupIndex()
+    stages = StageStore()
+    prompt_file = prompt_path("agent_assessment", "qa_expert")
+    kind = assessment_kind(TASK, provider, stage_inputs({"prompt": prompt_file}, model=DEFAULT_MODELS[provider]))
+
+    print("\n[1/3] Reading transcripts...")
+    calls = []
+    inputs = {}
+    reused = 0
+    fresh = 0
+    for path in iter_transcript_files(args.paths):
+        if not os.path.exists(path):
+            print(f"Warning: File '{path}' not found; skipped.")
+            continue
+        inputs[path] = stage_inputs({"transcript": path, "prompt": prompt_file}, model=DEFAULT_MODELS[provider])
+        preferred_fits = lambda: router.preferred_fits(
+            TASK, provider, in_tokens=count_tokens(read_docx(path), DEFAULT_MODELS[provider]))
+        if stages.up_to_date(TASK, output_paths(path), inputs[path], args.force, preferred_fits):
+            fresh += 1
+            continue
+        call = Call(path, read_docx(path), DEFAULT_MODELS[provider])
+        if not call.text.strip():
+            print(f"Warning: '{path}' is empty; skipped.")
+            continue
+        match = dedup.find_transcript(call.signature, kind, path)
+        if match and not (args.no_dedup or args.force) and reuse_outputs(match, [call.json_path, call.docx_path]):
+            stages.record(TASK, [call.json_path, call.docx_path], inputs[path])
+            reused += 1
+            continue
+        calls.append(call)
+
+    if not calls:
+        print(f"SUCCESS: Nothing to assess ({fresh} up to date, {reused} duplicates reused).")
+        return
+
+    packs, single = pack_calls(calls, args.pack_tokens, args.short_call_tokens)
+    print(f"[2/3] Assessing {len(calls)} calls: {sum(len(p) for p in packs)} in {len(packs)} packed requests, "
+          f"{len(single)} single...")
+
+    total_cost = 0.0
+    results: Dict[str, dict] = {}
+    models: Dict[str, str] = {}
+    try:
+        for pack in packs:
+            model = router.choose(PACKED_TASK, provider, in_tokens=sum(c.tokens for c in pack)).model
+            packed, failed, cost = assess_pack(provider, model, system_prompt, pack)
+            results.update(packed)
+            models.update((path, model) for path in packed)
+            single += failed
+            total_cost += cost
+        for call in single:
+            model = router.choose(TASK, provider, in_tokens=call.tokens).model
+            data, cost = assess_single(provider, model, system_prompt, call)
+            total_cost += cost
+            if data is not None:
+                results[call.path] = data
+                models[call.path] = model
+    except BudgetExceeded as e:
+        print(f"Warning: {e}; remaining calls were not assessed.")
+
+    print("[3/3] Saving assessments...")
+    for call in calls:
+        if call.path in results:
+            written = save_outputs(call, results[call.path])
+            if call.docx_path not in written:
+                # Kept for inspection but not registered, so the next run assesses it again
+                continue
+            dedup.add_transcript(call.signature, kind, call.path, written)
+            stages.record(TASK, written, inputs[call.path], models[call.path])
+
+    total_time = time.time() - total_start
+    print("-" * 40)
+    print(f"SUCCESS: {len(results)}/{len(calls)} assessments saved to outputs/ ({fresh} up to date, {reused} duplicates reused)")
+    print(f"Total Time: {total_time:.2f}s | Assessment Cost: ${total_cost:.4f}")
+    print("-" * 40)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import List, Tuple
+
+from router import Batch, parse_deadline
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Stage scripts per recording that make paid calls (all but the export)
+PAID_STAGES = 3
+
+def stage_commands(audio_path: str, provider: str) -> List[Tuple[str, List[str], List[str]]]:
+    """(stage, script and arguments, stages it depends on) for one recording, in run order."""
+    base_name = os.path.splitext(os.path.basename(audio_path))[0]
+    transcript = os.path.join("outputs", f"{base_name}_{provider}.docx")
+    return [
+        ("transcription", [f"{provider}_transcribe.py", audio_path], []),
+        ("agent_assessment", [f"{provider}_call_agent_assess.py", transcript], ["transcription"]),
+        ("project_assessment", [f"{provider}_project_assess.py", transcript], ["transcription"]),
+        ("export", ["export_to_excel.py", base_name, "--provider", provider], ["agent_assessment", "project_assessment"]),
+    ]
+
+def run_stage(command: List[str], extra: List[str]) -> bool:
+    """Runs a stage script; each script skips itself when its outputs are up to date."""
+    script, *arguments = command
+    result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script)] + arguments + extra)
+    return result.returncode == 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe, assess and export recordings, recomputing only stages whose inputs changed.")
+    parser.add_argument("audio_paths", nargs="+", help="Audio files to process")
+    parser.add_argument("--provider", default="gemini", choices=["gemini", "openai"], help="Provider for every stage")
+    parser.add_argument("--force", action="store_true", help="Recompute every stage even if its outputs are up to date")
+    parser.add_argument("--no-dedup", action="store_true", help="Do not reuse the outputs of duplicate recordings or transcripts")
+    parser.add_argument("--batch", default=None, help="Batch name shared by all paid stages (see router.py)")
+    parser.add_argument("--budget", type=float, default=None, help="Spending cap for the batch ($)")
+    parser.add_argument("--deadline", default=None, help="Batch deadline: 90s, 30m, 2h or HH:MM")
+
+    args = parser.parse_args()
+    missing = [p for p in args.audio_paths if not os.path.exists(p)]
+    if missing:
+        print(f"Error: File '{missing[0]}' not found.")
+        sys.exit(1)
+
+    # Options understood by the transcription and assessment scripts
+    paid = ["--no-dedup"] if args.no_dedup else []
+    if (args.budget is not None or args.deadline) and not args.batch:
+        # Stage scripts only share a budget or deadline through a named batch
+        args.batch = f"pipeline_{int(time.time())}_{os.getpid()}"
+        print(f"      Budget and deadline are shared as batch '{args.batch}'.")
+    for option in ("batch", "budget"):
+        value = getattr(args, option)
+        if value is not None:
+            paid += [f"--{option}", str(value)]
+    try:
+        deadline = parse_deadline(args.deadline) if args.deadline else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.batch:
+        # Every paid stage script run is one item of the batch, so the budget is spread over all of them
+        paid += ["--batch-items", str(len(args.audio_paths) * PAID_STAGES)]
+    force = ["--force"] if args.force else []
+
+    os.makedirs("outputs", exist_ok=True)
+    total_start = time.time()
+    failures = []
+    for i, audio_path in enumerate(args.audio_paths):
+        print(f"\n[{i + 1}/{len(args.audio_paths)}] {os.path.basename(audio_path)}")
+        failed = set()
+        for stage, command, depends in stage_commands(audio_path, args.provider):
+            blocked = [d for d in depends if d in failed]
+            if blocked:
+                print(f"Warning: {stage} skipped ({', '.join(blocked)} failed).")
+                failed.add(stage)
+                if args.batch and stage != "export":
+                    # Its share of the budget goes to the stages still to run
+                    Batch(args.batch).finish()
+                continue
+            print(f"--- {stage} ---")
+            extra = list(force)
+            if stage != "export":
+                extra += paid
+                if deadline is not None:
+                    # Relative deadlines are re-read by each script: pass the time left on the original one
+                    extra += ["--deadline", f"{max(0.0, deadline - time.time()):.0f}s"]
+            if not run_stage(command, extra):
+                print(f"Warning: {stage} failed for '{audio_path}'.")
+                failed.add(stage)
+        if failed:
+            failures.append((audio_path, sorted(failed)))
+
+    total_time = time.time() - total_start
+    print("-" * 40)
+    if failures:
+        for audio_path, stages in failures:
+            print(f"FAILED: {audio_path}: {', '.join(stages)}")
+        print(f"{len(failures)}/{len(args.audio_paths)} recordings incomplete after {total_time:.2f}s. "
+              "Rerun the same command to resume; finished stages are skipped.")
+        print("-" * 40)
+        sys.exit(1)
+    print(f"SUCCESS: {len(args.audio_paths)} recordings up to date in {total_time:.2f}s")
+    print("-" * 40)
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,9 @@ import os
 
 PROMPTS_DIR = "prompts"
 
-def load_prompt(category: str, name: str) -> str:
+def prompt_path(category: str, name: str) -> str:
     """
-    Loads a prompt from the prompts directory.
+    Returns the file a prompt is loaded from.
     category: transcription, agent_assessment, or project_assessment
     name: the filename without the .md extension
     """
@@ -14,6 +14,9 @@ def load_prompt(category: str, name: str) -> str:
         path = os.path.join(PROMPTS_DIR, f"transcript_analysis_{name}.md")
         if not os.path.exists(path):
             raise FileNotFoundError(f"Prompt file not found: {path} (checked both subfolder and root)")
-    
-    with open(path, 'r') as f:
+    return path
+
+def load_prompt(category: str, name: str) -> str:
+    """Loads a prompt from the prompts directory."""
+    with open(prompt_path(category, name), 'r') as f:
         return f.read().strip()
@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+from tracing import span, file_lock
+
+# Load environmental variables from .env file
+load_dotenv()
+
+OPENAI_MODEL = "gpt-4o"
+GEMINI_MODEL = "models/gemini-flash-latest"
+
+DEFAULT_MODELS = {
+    "openai": OPENAI_MODEL,
+    "gemini": GEMINI_MODEL,
+}
+
+API_KEYS = {
+    "openai": "OPENAI_API_KEY",
+    "gemini": "GEMINI_API_KEY",
+}
+
+# Models per provider, preferred first; the router degrades down the list
+MODELS = {
+    "openai": [OPENAI_MODEL, "gpt-4o-mini"],
+    "gemini": [GEMINI_MODEL, "models/gemini-flash-lite-latest"],
+}
+
+# Estimated prices per model: $ per input/output token, per cached input token, per audio
+# second, and per cached token per hour of Gemini cache storage
+PRICING = {
+    "whisper-1": {"audio": 0.006 / 60},
+    "gpt-4o": {"input": 0.0025 / 1000, "cached_input": 0.00125 / 1000, "output": 0.010 / 1000},
+    "gpt-4o-mini": {"input": 0.00015 / 1000, "cached_input": 0.000075 / 1000, "output": 0.0006 / 1000},
+    "models/gemini-flash-latest": {"input": 0.40 / 1000000, "cached_input": 0.10 / 1000000, "output": 0.40 / 1000000,
+                                   "audio": 0.05 / 3600, "cache_hour": 1.00 / 1000000},
+    "models/gemini-flash-lite-latest": {"input": 0.10 / 1000000, "cached_input": 0.025 / 1000000, "output": 0.40 / 1000000,
+                                        "audio": 0.015 / 3600, "cache_hour": 1.00 / 1000000},
+}
+
+# Gemini context caching of system prompts: lifetime of a cache and the shortest prompt worth caching
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))
+GEMINI_CACHE_MIN_TOKENS = 1024
+GEMINI_CACHE_FILE = os.path.join("outputs", "gemini_caches.json")
+
+# Input limits per model (tokens)
+CONTEXT_TOKENS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "models/gemini-flash-latest": 1000000,
+    "models/gemini-flash-lite-latest": 1000000,
+}
+
+def count_tokens(text: str, model: str) -> int:
+    """Token count with tiktoken for OpenAI models, estimated from words (x1.5) otherwise."""
+    if model.startswith("gpt"):
+        try:
+            import tiktoken
+            return len(tiktoken.encoding_for_model(model).encode(text))
+        except Exception:
+            pass
+    return int(len(text.split()) * 1.5)
+
+def estimate_cost(model: str, in_tokens: float = 0, out_tokens: float = 0, audio_seconds: float = 0.0,
+                  cached_tokens: float = 0) -> float:
+    """Estimated dollar cost of a call from the PRICING table; `cached_tokens` is part of `in_tokens`."""
+    rates = PRICING.get(model, {})
+    cached_rate = rates.get("cached_input", rates.get("input", 0.0))
+    return ((in_tokens - cached_tokens) * rates.get("input", 0.0) + cached_tokens * cached_rate
+            + out_tokens * rates.get("output", 0.0) + audio_seconds * rates.get("audio", 0.0))
+
+def _usage_metrics(model: str, in_tokens: int, out_tokens: int, cached_tokens: int) -> Dict[str, float]:
+    return {"cost": estimate_cost(model, in_tokens, out_tokens, cached_tokens=cached_tokens),
+            "in_tokens": in_tokens, "out_tokens": out_tokens, "cached_tokens": cached_tokens}
+
+_clients = {}
+_lock = threading.Lock()
+
+def available(provider: str) -> bool:
+    """True when the provider's API key is configured."""
+    return bool(os.getenv(API_KEYS.get(provider, "")))
+
+def openai_client():
+    """Returns the shared OpenAI client, created on first use."""
+    with _lock:
+        if "openai" not in _clients:
+            from openai import OpenAI
+            _clients["openai"] = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return _clients["openai"]
+
+def gemini_client():
+    """Returns the configured google.generativeai module, configured on first use."""
+    with _lock:
+        if "gemini" not in _clients:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            _clients["gemini"] = genai
+        return _clients["gemini"]
+
+def openai_complete(system_prompt: str, user_content: str, model: str = OPENAI_MODEL) -> Tuple[str, Dict[str, float]]:
+    """
+    Runs a system + user chat completion and returns the content with token/cost metrics.
+    The system prompt leads the request unchanged, so OpenAI's automatic prompt caching
+    serves it from cache on repeated calls; cached tokens are reported by the API.
+    """
+    response = openai_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ]
+    )
+    content = response.choices[0].message.content
+    usage = getattr(response, "usage", None)
+    if usage is not None and usage.prompt_tokens:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        return content, _usage_metrics(model, usage.prompt_tokens, usage.completion_tokens, cached)
+    return content, _usage_metrics(model, count_tokens(system_prompt + user_content, model), count_tokens(content, model), 0)
+
+class GeminiPromptCache:
+    """
+    Gemini cached contents holding system prompts, shared across runs through a small JSON
+    registry so a batch of scripts reuses one cache per (model, prompt) until it expires.
+    """
+
+    def __init__(self, path: str = GEMINI_CACHE_FILE, ttl: int = GEMINI_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.failed = set()
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, key: str, name: Optional[str], expires: float = 0.0):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Concurrent scripts share the registry: read-modify-write under a file lock
+        with file_lock(self.path):
+            now = time.time()
+            registry = {k: v for k, v in self._load().items() if v["expires"] > now}
+            if name:
+                registry[key] = {"name": name, "expires": expires}
+            else:
+                registry.pop(key, None)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(registry, f)
+            os.replace(tmp_path, self.path)
+
+    def model(self, model: str, system_prompt: str):
+        """A GenerativeModel backed by the cached prompt, or None when caching does not apply."""
+        if self.ttl <= 0 or count_tokens(system_prompt, model) < GEMINI_CACHE_MIN_TOKENS:
+            return None
+        key = hashlib.sha256(f"{model}\0{system_prompt}".encode("utf-8")).hexdigest()
+        if key in self.failed:
+            return None
+        genai = gemini_client()
+        from google.generativeai import caching
+
+        with self._lock:
+            entry = self._load().get(key)
+            if entry and entry["expires"] - time.time() > 60:
+                try:
+                    return genai.GenerativeModel.from_cached_content(caching.CachedContent.get(entry["name"]))
+                except Exception:
+                    self._store(key, None)
+            try:
+                tokens = count_tokens(system_prompt, model)
+                with span("prompt_cache", provider="gemini", model=model, prompt_tokens=tokens,
+                          cost=tokens * (self.ttl / 3600) * PRICING.get(model, {}).get("cache_hour", 0.0)):
+                    cache = caching.CachedContent.create(model=model, system_instruction=system_prompt,
+                                                         ttl=timedelta(seconds=self.ttl), display_name=key[:16])
+            except Exception as e:
+                # Prompt below the model's minimum, or a model without caching: send it inline
+                print(f"Warning: Gemini prompt caching unavailable for {model} ({e}); sending the prompt inline.")
+                self.failed.add(key)
+                return None
+            self._store(key, cache.name, time.time() + self.ttl)
+            return genai.GenerativeModel.from_cached_content(cache)
+
+gemini_cache = GeminiPromptCache()
+
+def gemini_complete(system_prompt: str, user_content: str, model: str = GEMINI_MODEL) -> Tuple[str, Dict[str, float]]:
+    """
+    Runs a generation with the prompt as system instruction (served from a Gemini cached
+    content when it is long enough) and returns the text with token/cost metrics.
+    """
+    genai = gemini_client()
+    cached_model = gemini_cache.model(model, system_prompt)
+    if cached_model is not None:
+        response = cached_model.generate_content(user_content)
+    else:
+        response = genai.GenerativeModel(model, system_instruction=system_prompt).generate_content(user_content)
+    content = response.text
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and usage.prompt_token_count:
+        cached = getattr(usage, "cached_content_token_count", 0) or 0
+        return content, _usage_metrics(model, usage.prompt_token_count, usage.candidates_token_count, cached)
+    in_tokens = count_tokens(system_prompt, model) + count_tokens(user_content, model)
+    return content, _usage_metrics(model, in_tokens, count_tokens(content, model), 0)
+
+COMPLETERS = {
+    "openai": openai_complete,
+    "gemini": gemini_complete,
+}
+
+def complete(provider: str, model: str, system_prompt: str, user_content: str) -> Tuple[str, Dict[str, float]]:
+    """Dispatches a text completion to the given provider."""
+    if provider not in COMPLETERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    return COMPLETERS[provider](system_prompt, user_content, model or DEFAULT_MODELS[provider])
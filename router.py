@@ -0,0 +1,287 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import atexit
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from providers import MODELS, CONTEXT_TOKENS, estimate_cost
+from history import history
+from tracing import tracer, TRACE_DIR
+
+BATCH_DIR = os.path.join(TRACE_DIR, "batches")
+
+# Output size assumed for a task/model without history: a share of the input, or tokens per second of speech
+DEFAULT_OUTPUT_RATIO = 0.5
+SPEECH_TOKENS_PER_SECOND = 4.0
+
+class BudgetExceeded(Exception):
+    """Raised when a batch has no budget or time left for another paid call."""
+
+class Route(NamedTuple):
+    provider: str
+    model: str
+    cost: float
+    latency: Optional[float]
+
+def parse_deadline(value: str) -> float:
+    """Parses "90s", "30m", "2h" (from now) or "HH:MM" (today, or tomorrow if past) into an epoch time."""
+    value = value.strip().lower()
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([smh])", value)
+    if match:
+        return time.time() + float(match.group(1)) * {"s": 1, "m": 60, "h": 3600}[match.group(2)]
+    try:
+        clock = datetime.strptime(value, "%H:%M")
+    except ValueError:
+        raise ValueError(f"Invalid deadline '{value}' (use 90s, 30m, 2h or HH:MM)")
+    now = datetime.now()
+    due = now.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    if due <= now:
+        due += timedelta(days=1)
+    return due.timestamp()
+
+class Batch:
+    """
+    Spending and time ledger shared by every run of a named batch. Each run writes its own
+    file under outputs/batches/<name>/, so concurrent runs never overwrite each other.
+    """
+
+    def __init__(self, name: Optional[str] = None, budget: Optional[float] = None,
+                 deadline: Optional[float] = None, items: Optional[int] = None):
+        self.name = name
+        self.spent = 0.0
+        self.tokens = {"in_tokens": 0, "cached_tokens": 0}
+        self.finished = False
+        self._lock = threading.Lock()
+        self.dir = os.path.join(BATCH_DIR, name) if name else None
+        self.run_path = None
+        config = {"budget": budget, "deadline": deadline, "items": items}
+        if self.dir:
+            os.makedirs(self.dir, exist_ok=True)
+            config_path = os.path.join(self.dir, "batch.json")
+            if os.path.exists(config_path):
+                with open(config_path, 'r') as f:
+                    stored = json.load(f)
+                # Limits given on the command line override the ones the batch was created with
+                config = {k: v if v is not None else stored.get(k) for k, v in config.items()}
+            with open(config_path, 'w') as f:
+                json.dump(config, f)
+            self.run_path = os.path.join(self.dir, f"run_{os.getpid()}_{uuid.uuid4().hex[:8]}.json")
+        self.budget = config["budget"]
+        self.deadline = config["deadline"]
+        self.items = config["items"]
+
+    def _runs(self) -> List[dict]:
+        runs = []
+        if not self.dir:
+            return runs
+        for name in os.listdir(self.dir):
+            path = os.path.join(self.dir, name)
+            if name.startswith("run_") and name.endswith(".json") and path != self.run_path:
+                try:
+                    with open(path, 'r') as f:
+                        runs.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return runs
+
+    def total_spent(self) -> float:
+        """Dollars spent by all runs of the batch, this one included."""
+        with self._lock:
+            spent = self.spent
+        return spent + sum(run.get("spent", 0.0) for run in self._runs())
+
+    def remaining_items(self) -> int:
+        """Items still to process, counting the current one."""
+        if not self.items:
+            return 1
+        done = sum(1 for run in self._runs() if run.get("finished"))
+        return max(1, self.items - done)
+
+    def totals(self) -> dict:
+        """Spend and input tokens (all and served from prompt caches) across the batch's runs."""
+        runs = self._runs()
+        with self._lock:
+            runs.append({"spent": self.spent, "finished": self.finished, **self.tokens})
+        totals = {field: sum(run.get(field, 0) for run in runs) for field in ("spent", "in_tokens", "cached_tokens")}
+        totals.update(runs=len(runs), finished=sum(1 for run in runs if run.get("finished")))
+        return totals
+
+    def on_span(self, span):
+        if span.status != "ok":
+            return
+        cost = span.attributes.get("cost")
+        changed = False
+        with self._lock:
+            if isinstance(cost, (int, float)) and cost:
+                self.spent += cost
+                changed = True
+            for field in self.tokens:
+                value = span.attributes.get(field)
+                if isinstance(value, (int, float)) and value:
+                    self.tokens[field] += value
+                    changed = True
+        if changed:
+            self.save()
+
+    def save(self):
+        if not self.dir:
+            return
+        with self._lock:
+            state = {"spent": self.spent, "finished": self.finished, "pid": os.getpid(), **self.tokens}
+        tmp_path = self.run_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.run_path)
+
+    def finish(self):
+        """Marks this run's item as processed (failed runs count too: their slot is used up)."""
+        self.finished = True
+        self.save()
+
+class Router:
+    """
+    Picks a model per task from the provider's MODELS list using the input size (tokens,
+    audio seconds) and the latency/cost history of earlier runs. Within a batch it keeps the
+    projected spend and finish time inside the budget and deadline by degrading to cheaper
+    or faster models, and refuses new calls once either is exhausted.
+    """
+
+    def __init__(self, batch: Optional[Batch] = None):
+        self.batch = batch or Batch()
+        tracer.add_listener(self.batch.on_span)
+
+    def estimate(self, task: str, provider: str, model: str, in_tokens: int = 0, audio_seconds: float = 0.0) -> Route:
+        """Expected cost and latency of one call, scaled from history when there is any."""
+        samples = history.get(task, provider, model)
+        in_seen = sum(s.get("in_tokens", 0) for s in samples)
+        out_seen = sum(s.get("out_tokens", 0) for s in samples)
+        audio_seen = sum(s.get("audio_seconds", 0.0) for s in samples)
+
+        if audio_seconds:
+            out_tokens = audio_seconds * (out_seen / audio_seen if audio_seen and out_seen else SPEECH_TOKENS_PER_SECOND)
+        else:
+            out_tokens = in_tokens * (out_seen / in_seen if in_seen and out_seen else DEFAULT_OUTPUT_RATIO)
+        cost = estimate_cost(model, in_tokens, out_tokens, audio_seconds)
+
+        latency = None
+        if samples:
+            total = sum(s["latency"] for s in samples)
+            if audio_seconds and audio_seen:
+                latency = total / audio_seen * audio_seconds
+            elif in_tokens and in_seen:
+                latency = total / in_seen * in_tokens
+            else:
+                latency = history.latency(task, provider, model, q=0.5)
+        return Route(provider, model, cost, latency)
+
+    def check(self) -> Tuple[Optional[float], Optional[float]]:
+        """Returns the batch's remaining (dollars, seconds); raises BudgetExceeded if either ran out."""
+        batch = self.batch
+        remaining_budget = batch.budget - batch.total_spent() if batch.budget is not None else None
+        remaining_time = batch.deadline - time.time() if batch.deadline is not None else None
+        if remaining_budget is not None and remaining_budget <= 0:
+            raise BudgetExceeded(f"Batch budget of ${batch.budget:.2f} is spent")
+        if remaining_time is not None and remaining_time <= 0:
+            raise BudgetExceeded("Batch deadline has passed")
+        return remaining_budget, remaining_time
+
+    def choose(self, task: str, provider: str, in_tokens: int = 0, audio_seconds: float = 0.0) -> Route:
+        """Returns the preferred model that fits the batch's per-item share of budget and time."""
+        route, preferred, reason = self._select(task, provider, in_tokens, audio_seconds)
+        if route is not preferred:
+            self._degraded(task, preferred, route, reason)
+        return route
+
+    def preferred_fits(self, task: str, provider: str, in_tokens: int = 0, audio_seconds: float = 0.0) -> bool:
+        """True when choose would now take the preferred model (False once the batch is exhausted)."""
+        try:
+            route, preferred, _ = self._select(task, provider, in_tokens, audio_seconds)
+        except BudgetExceeded:
+            return False
+        return route is preferred
+
+    def _select(self, task: str, provider: str, in_tokens: int, audio_seconds: float) -> Tuple[Route, Route, str]:
+        """(route, preferred route, reason a different route was taken)."""
+        models = [m for m in MODELS[provider] if in_tokens <= CONTEXT_TOKENS.get(m, in_tokens)] or MODELS[provider]
+        candidates = [self.estimate(task, provider, model, in_tokens, audio_seconds) for model in models]
+
+        remaining_budget, remaining_time = self.check()
+        items = self.batch.remaining_items()
+
+        def fits(route: Route) -> bool:
+            if remaining_budget is not None and route.cost > remaining_budget / items:
+                return False
+            if remaining_time is not None and route.latency is not None and route.latency > remaining_time / items:
+                return False
+            return True
+
+        for route in candidates:
+            if fits(route):
+                return route, candidates[0], "at risk"
+
+        # Nothing fits the per-item share: take the cheapest (budget) or fastest (deadline) option
+        if remaining_budget is not None and min(r.cost for r in candidates) > remaining_budget / items:
+            route = min(candidates, key=lambda r: r.cost)
+            if route.cost > remaining_budget:
+                raise BudgetExceeded(f"Batch has ${remaining_budget:.4f} left; the cheapest {task} call costs ~${route.cost:.4f}")
+            reason = "budget"
+        else:
+            route = min(candidates, key=lambda r: r.latency if r.latency is not None else 0.0)
+            reason = "deadline"
+        return route, candidates[0], f"{reason} at risk"
+
+    def _degraded(self, task: str, preferred: Route, route: Route, reason: str):
+        print(f"      Router: {task} on {route.model} instead of {preferred.model} (batch {reason}).")
+        tracer.count("route_degraded_total", task=task, model=route.model)
+
+def add_arguments(parser):
+    """Adds the batch budget/deadline options shared by the scripts."""
+    parser.add_argument("--batch", default=None, help="Batch name; runs with the same name share its budget and deadline")
+    parser.add_argument("--budget", type=float, default=None, help="Spending cap for the batch ($)")
+    parser.add_argument("--deadline", default=None, help="Batch deadline: 90s, 30m, 2h or HH:MM")
+    parser.add_argument("--batch-items", type=int, default=None, help="Number of files in the batch (spreads budget and time)")
+
+def from_args(args) -> Router:
+    """
+    Builds the router for a script run; raises ValueError on an invalid deadline. The run
+    counts as one finished item of its batch when it exits, even if it had nothing to do.
+    """
+    deadline = parse_deadline(args.deadline) if args.deadline else None
+    batch = Batch(args.batch, args.budget, deadline, args.batch_items)
+    atexit.register(batch.finish)
+    return Router(batch)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a batch's spend, progress and prompt-cache savings.")
+    parser.add_argument("batch", help="Batch name")
+    args = parser.parse_args()
+
+    if not os.path.isdir(os.path.join(BATCH_DIR, args.batch)):
+        print(f"Error: Batch '{args.batch}' not found in {BATCH_DIR}.")
+        sys.exit(1)
+
+    batch = Batch(args.batch)
+    totals = batch.totals()
+    # This status run is not part of the batch
+    totals["runs"] -= 1
+    in_tokens, cached = totals["in_tokens"], totals["cached_tokens"]
+    budget = f"${batch.budget:.2f}" if batch.budget is not None else "none"
+    deadline = datetime.fromtimestamp(batch.deadline).strftime("%Y-%m-%d %H:%M") if batch.deadline else "none"
+    items = f"/{batch.items}" if batch.items else ""
+    print("-" * 40)
+    print(f"{'Runs finished':<20} | {totals['finished']}{items} ({totals['runs']} started)")
+    print(f"{'Spent':<20} | ${totals['spent']:.4f} (budget {budget})")
+    print(f"{'Deadline':<20} | {deadline}")
+    print(f"{'Input tokens':<20} | {in_tokens}")
+    print(f"{'  cached':<20} | {cached} ({cached / in_tokens if in_tokens else 0:.0%})")
+    print(f"{'  uncached':<20} | {in_tokens - cached}")
+    print("-" * 40)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import os
+import re
+import sys
+import math
+import time
+import sqlite3
+import argparse
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from transcript import Transcript, iter_segments
+from utils import format_timecode, read_docx
+from tracing import span
+
+INDEX_PATH = os.path.join("outputs", "search_index.sqlite")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+SNIPPET_CHARS = 160
+SNIPPETS_PER_CALL = 3
+
+# Output files that are not transcripts
+SKIPPED_SUFFIXES = ("_assessment.docx",)
+
+STOPWORDS = set("""
+a an and are as at be but by for from has have i in is it its of on or that the this to was were will with you
+au aux avec ce ces dans de des du elle en et eux il ils je la le les leur lui ma mais me meme mes moi mon ne nos
+notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous c d j l m n s t y
+est sont etre ai as avons avez ont
+ana nta nti howa hiya hna ntoma homa dyal dial had hadi hada hadak hadik li lli w wa f fi l b bl 3la ala m3a mea
+wach ach chno ila ola o
+في من على عن الى إلى و او أو ما لا هذا هذه ذلك التي الذي انا أنا هو هي نحن
+""".split())
+
+_ARABIC_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي",
+    "ـ": None,
+})
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+def normalize(text: str) -> str:
+    """Lowercases, folds Arabic letter variants and strips accents/diacritics (é -> e, harakat)."""
+    text = text.lower().translate(_ARABIC_FOLD)
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+def tokenize(text: str) -> List[str]:
+    """
+    Darija/French/English tokens: Arabic script and Latin (Arabizi digits such as 3/7/9
+    stay inside words), elisions split ("l'agent" -> "agent"), stopwords dropped.
+    """
+    return [t for t in TOKEN_PATTERN.findall(normalize(text)) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+def parse_clock(value: str) -> float:
+    """Parses HH:MM:SS, MM:SS or plain seconds."""
+    seconds = 0.0
+    for part in value.strip("[]").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def transcript_from_text(text: str) -> Transcript:
+    """Keeps only the timecoded lines of a transcript document (not its title or summary)."""
+    return Transcript.from_segments(seg for seg in iter_segments(text) if seg.start is not None)
+
+class SearchIndex:
+    """Incremental BM25 inverted index over transcript segments, stored in SQLite."""
+
+    def __init__(self, path: str = INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, length INTEGER, indexed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS segments (
+                doc_id INTEGER, idx INTEGER, start REAL, end REAL, speaker TEXT, text TEXT,
+                PRIMARY KEY (doc_id, idx)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT, doc_id INTEGER, idx INTEGER, tf INTEGER,
+                PRIMARY KEY (term, doc_id, idx)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS doc_postings (
+                term TEXT, doc_id INTEGER, tf INTEGER,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def is_current(self, path: str) -> bool:
+        row = self.db.execute("SELECT mtime FROM docs WHERE path = ?", (path,)).fetchone()
+        return row is not None and os.path.exists(path) and row[0] == os.path.getmtime(path)
+
+    def _remove(self, doc_id: int):
+        self.db.executemany(
+            "UPDATE terms SET df = df - 1 WHERE term = ?",
+            self.db.execute("SELECT DISTINCT term FROM postings WHERE doc_id = ?", (doc_id,)).fetchall(),
+        )
+        self.db.execute("DELETE FROM terms WHERE df <= 0")
+        self.db.execute(
+            "DELETE FROM doc_postings WHERE (term, doc_id) IN (SELECT DISTINCT term, doc_id FROM postings WHERE doc_id = ?)",
+            (doc_id,),
+        )
+        self.db.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.db.execute("DELETE FROM segments WHERE doc_id = ?", (doc_id,))
+        self.db.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def remove(self, path: str):
+        with self.db:
+            row = self.db.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+            if row:
+                self._remove(row[0])
+
+    def add(self, path: str, transcript: Transcript):
+        """(Re)indexes one call; replaces any previous version of the same path."""
+        with span("index", segments=len(transcript)) as s, self.db:
+            row = self.db.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+            if row:
+                self._remove(row[0])
+            mtime = os.path.getmtime(path) if os.path.exists(path) else None
+            doc_id = self.db.execute(
+                "INSERT INTO docs (path, mtime, length, indexed_at) VALUES (?, ?, 0, ?)", (path, mtime, time.time())
+            ).lastrowid
+
+            segments, postings = [], []
+            doc_terms = Counter()
+            for idx, seg in enumerate(transcript):
+                segments.append((doc_id, idx, seg.start, seg.end, seg.speaker, seg.text))
+                counts = Counter(tokenize(seg.text))
+                doc_terms.update(counts)
+                postings.extend((term, doc_id, idx, tf) for term, tf in counts.items())
+            length = sum(doc_terms.values())
+
+            self.db.executemany("INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?)", segments)
+            self.db.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", postings)
+            # Call-level postings keep unfiltered ranking to one row per call and term
+            self.db.executemany("INSERT INTO doc_postings VALUES (?, ?, ?)",
+                                [(term, doc_id, tf) for term, tf in doc_terms.items()])
+            self.db.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                [(t,) for t in doc_terms],
+            )
+            self.db.execute("UPDATE docs SET length = ? WHERE id = ?", (length, doc_id))
+            s.set(terms=len(doc_terms), tokens=length)
+
+    def add_file(self, path: str) -> bool:
+        """Indexes a transcript file if it changed since it was last indexed."""
+        if self.is_current(path):
+            return False
+        if path.endswith(".docx"):
+            text = read_docx(path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        self.add(path, transcript_from_text(text))
+        return True
+
+    def search(self, query: str, speaker: Optional[str] = None, start: Optional[float] = None,
+               end: Optional[float] = None, limit: int = 10) -> List[dict]:
+        """BM25-ranked calls matching `query`, each with its best timecoded snippets."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        n_docs, avg_length = self.db.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not n_docs:
+            return []
+        avg_length = avg_length or 1.0
+
+        filters, params = [], []
+        if speaker:
+            filters.append("s.speaker = ? COLLATE NOCASE")
+            params.append(speaker)
+        if start is not None:
+            filters.append("s.start >= ?")
+            params.append(start)
+        if end is not None:
+            filters.append("s.start < ?")
+            params.append(end)
+        join = ""
+        if filters:
+            join = " JOIN segments s ON s.doc_id = p.doc_id AND s.idx = p.idx AND " + " AND ".join(filters)
+            sql = f"SELECT p.doc_id, SUM(p.tf) FROM postings p{join} WHERE p.term = ? GROUP BY p.doc_id"
+        else:
+            sql = "SELECT doc_id, tf FROM doc_postings WHERE term = ?"
+
+        tf: Dict[int, Dict[str, int]] = defaultdict(dict)
+        idf = {}
+        for term in terms:
+            row = self.db.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if not row:
+                continue
+            idf[term] = math.log(1 + (n_docs - row[0] + 0.5) / (row[0] + 0.5))
+            for doc_id, count in self.db.execute(sql, params + [term]):
+                tf[doc_id][term] = count
+
+        if not tf:
+            return []
+        lengths = dict(self.db.execute(
+            f"SELECT id, length FROM docs WHERE id IN ({','.join('?' * len(tf))})", list(tf)
+        ).fetchall())
+        scores = []
+        for doc_id, term_counts in tf.items():
+            norm = K1 * (1 - B + B * lengths.get(doc_id, avg_length) / avg_length)
+            score = sum(idf[t] * c * (K1 + 1) / (c + norm) for t, c in term_counts.items())
+            scores.append((score, doc_id))
+        scores.sort(reverse=True)
+
+        # Snippets only for the returned calls: segments matching the most query terms
+        matched = [t for t in terms if t in idf]
+        snippet_sql = (
+            f"SELECT s2.start, s2.speaker, s2.text FROM ("
+            f"SELECT p.idx, COUNT(*) AS n FROM postings p{join} "
+            f"WHERE p.term IN ({','.join('?' * len(matched))}) AND p.doc_id = ? "
+            f"GROUP BY p.idx ORDER BY n DESC, p.idx LIMIT {SNIPPETS_PER_CALL}"
+            f") best JOIN segments s2 ON s2.doc_id = ? AND s2.idx = best.idx ORDER BY best.idx"
+        )
+        results = []
+        for score, doc_id in scores[:limit]:
+            path = self.db.execute("SELECT path FROM docs WHERE id = ?", (doc_id,)).fetchone()[0]
+            snippets = [
+                {"start": seg_start, "speaker": speaker_name, "text": _snippet(text, matched)}
+                for seg_start, speaker_name, text in self.db.execute(snippet_sql, params + matched + [doc_id, doc_id])
+            ]
+            results.append({"path": path, "score": round(score, 4), "snippets": snippets})
+        return results
+
+def _snippet(text: str, terms: List[str]) -> str:
+    """Cuts `text` around its first matching term."""
+    if len(text) <= SNIPPET_CHARS:
+        return text
+    folded = normalize(text)
+    positions = [folded.find(t) for t in terms if folded.find(t) >= 0]
+    center = min(positions) if positions else 0
+    begin = max(0, center - SNIPPET_CHARS // 3)
+    end = begin + SNIPPET_CHARS
+    return ("..." if begin else "") + text[begin:end].strip() + ("..." if end < len(text) else "")
+
+def index_transcript(path: str, transcript: Transcript, index_path: str = INDEX_PATH):
+    """Adds a freshly produced transcript to the search index (called by the transcription scripts)."""
+    try:
+        index = SearchIndex(index_path)
+        try:
+            index.add(path, transcript)
+        finally:
+            index.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not update the search index: {e}")
+
+def iter_transcript_files(paths: Iterable[str]) -> Iterable[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if name.endswith(".docx") and not name.endswith(SKIPPED_SUFFIXES) and not name.startswith("~$"):
+                    yield full
+        else:
+            yield path
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over call transcripts.")
+    parser.add_argument("--index-path", default=INDEX_PATH, help="SQLite index file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    idx = sub.add_parser("index", help="Index new or changed transcripts")
+    idx.add_argument("paths", nargs="*", default=["outputs"], help="Transcript files or directories (default: outputs)")
+
+    srch = sub.add_parser("search", help="Search indexed calls")
+    srch.add_argument("query", nargs="+", help="Search terms")
+    srch.add_argument("--speaker", default=None, help="Only match lines from this speaker (e.g. 'Speaker A')")
+    srch.add_argument("--from", dest="start", default=None, help="Only match from this timecode (HH:MM:SS)")
+    srch.add_argument("--to", dest="end", default=None, help="Only match before this timecode (HH:MM:SS)")
+    srch.add_argument("--limit", type=int, default=10, help="Maximum number of calls")
+
+    args = parser.parse_args()
+    index = SearchIndex(args.index_path)
+
+    if args.command == "index":
+        start_time = time.time()
+        indexed = skipped = 0
+        for path in iter_transcript_files(args.paths):
+            if not os.path.exists(path):
+                print(f"Warning: {path} not found. Skipping.")
+                continue
+            if index.add_file(path):
+                indexed += 1
+                print(f"      Indexed {path}")
+            else:
+                skipped += 1
+        print(f"SUCCESS: {indexed} indexed, {skipped} unchanged in {time.time() - start_time:.2f}s")
+    else:
+        start_time = time.time()
+        try:
+            start = parse_clock(args.start) if args.start else None
+            end = parse_clock(args.end) if args.end else None
+        except ValueError:
+            print("Error: --from/--to must be timecodes like 00:01:30.")
+            sys.exit(1)
+        results = index.search(" ".join(args.query), args.speaker, start, end, args.limit)
+        elapsed = (time.time() - start_time) * 1000
+        for rank, result in enumerate(results, 1):
+            print(f"\n{rank}. {result['path']}  (score {result['score']})")
+            for snip in result["snippets"]:
+                speaker = f"{snip['speaker']}: " if snip["speaker"] else ""
+                print(f"   {format_timecode(snip['start'])} {speaker}{snip['text']}")
+        print("-" * 40)
+        print(f"{len(results)} call(s) in {elapsed:.1f}ms")
+    index.close()
+
+if __name__ == "__main__":
+    main()
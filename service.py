@@ -0,0 +1,560 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import shutil
+import threading
+from http import HTTPStatus
+from contextlib import contextmanager
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+from utils import read_docx, save_json, clean_markdown, save_assessment_docx, get_audio_duration
+from prompt_manager import load_prompt
+from tracing import span, tracer
+from history import history
+from writers import write_outputs, parse_formats
+from search_index import index_transcript, transcript_from_text
+from transcript import Transcript
+from providers import complete, count_tokens, available, openai_client, gemini_client, DEFAULT_MODELS, API_KEYS, OPENAI_MODEL
+from router import BudgetExceeded, Router, add_arguments, from_args
+
+# Load environmental variables from .env file
+load_dotenv()
+
+JOBS_DIR = os.path.join("outputs", "jobs")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8750
+DEFAULT_WORKERS = 4
+
+# Set to require "Authorization: Bearer <token>" on every request
+TOKEN_ENV = "JOB_SERVICE_TOKEN"
+
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+READ_CHUNK = 1 << 20
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 60.0
+# Traces, metrics and routing history are written out this often (and on shutdown)
+EXPORT_INTERVAL = 30.0
+
+TRANSCRIPT_EXTENSIONS = (".docx", ".txt")
+TASKS = ("agent", "project", "export")
+
+CONTENT_TYPES = {
+    ".json": "application/json",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".srt": "application/x-subrip",
+    ".vtt": "text/vtt",
+    ".md": "text/markdown; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".txt": "text/plain; charset=utf-8",
+}
+
+# (task, prompt category, prompt name, output suffix) of each assessment, as in the assessment scripts
+ANALYSES = {
+    "agent": [("agent_assessment", "agent_assessment", "qa_expert", "assessment")],
+    "project": [("qualitative", "project_assessment", "qualitative", "qualitative"),
+                ("notations", "project_assessment", "notations", "notations")],
+}
+USER_PREFIXES = {
+    "agent": "Analyze this transcript:\n\n",
+    "project": "Transcript to analyze:\n\n",
+}
+
+CLIENTS = {
+    "openai": openai_client,
+    "gemini": gemini_client,
+}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class Job:
+    """
+    A submitted recording or transcript processed in the worker pool. Progress is kept as
+    an ordered list of events (stage changes and partial results) that clients can stream.
+    """
+
+    def __init__(self, job_id: str, kind: str, provider: str, filename: str, tasks: List[str], formats: List[str]):
+        self.id = job_id
+        self.kind = kind
+        self.provider = provider
+        self.filename = filename
+        self.tasks = tasks
+        self.formats = formats
+        self.dir = os.path.join(JOBS_DIR, job_id)
+        self.source = os.path.join(self.dir, filename)
+        self.base_name = os.path.splitext(filename)[0]
+        self.status = "queued"
+        self.error = None
+        self.cost = 0.0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.stages: List[dict] = []
+        self.artifacts: List[str] = []
+        self.events: List[dict] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Binds the job to the server loop so streaming clients are woken on new events."""
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    def to_dict(self, events: bool = False) -> dict:
+        with self._lock:
+            data = {
+                "id": self.id, "kind": self.kind, "provider": self.provider, "filename": self.filename,
+                "tasks": self.tasks, "formats": self.formats, "status": self.status, "error": self.error,
+                "cost": round(self.cost, 6), "created": self.created, "started": self.started,
+                "finished": self.finished, "stages": list(self.stages),
+                "artifacts": [{"name": name, "url": f"/jobs/{self.id}/artifacts/{quote(name)}"} for name in self.artifacts],
+                "events": len(self.events),
+            }
+            if events:
+                data["events"] = list(self.events)
+        return data
+
+    def emit(self, event: str, **data):
+        """Appends an event (thread-safe), persists the job and wakes streaming clients."""
+        with self._lock:
+            self.events.append({"event": event, "ts": time.time(), **data})
+        self.save()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self, seen: int):
+        """Returns once there are more than `seen` events or the job is finished."""
+        while len(self.events) <= seen and not self.done:
+            await self._changed.wait()
+
+    def set_status(self, status: str, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            if status == "running":
+                self.started = time.time()
+            elif status in ("done", "failed"):
+                self.finished = time.time()
+        self.emit("status", status=status, **({"error": error} if error else {}))
+
+    @contextmanager
+    def stage(self, name: str):
+        """Records a stage's status and duration on the job."""
+        start = time.time()
+        self.emit("stage", stage=name, status="running")
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            entry = {"stage": name, "status": status, "seconds": round(time.time() - start, 3)}
+            with self._lock:
+                self.stages.append(entry)
+            self.emit("stage", **entry)
+
+    def add_artifact(self, path: str):
+        name = os.path.basename(path)
+        with self._lock:
+            if name not in self.artifacts:
+                self.artifacts.append(name)
+        self.emit("artifact", name=name, url=f"/jobs/{self.id}/artifacts/{quote(name)}")
+
+    def save(self):
+        state = self.to_dict(events=True)
+        tmp_path = os.path.join(self.dir, "job.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.dir, "job.json"))
+
+    @classmethod
+    def load(cls, path: str) -> "Job":
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        job = cls(state["id"], state["kind"], state["provider"], state["filename"], state["tasks"], state["formats"])
+        for field in ("status", "error", "cost", "created", "started", "finished", "stages", "events"):
+            setattr(job, field, state[field])
+        job.artifacts = [a["name"] for a in state["artifacts"]]
+        return job
+
+class JobService:
+    """
+    HTTP front end to the transcription and assessment stages. Jobs run in one shared
+    thread pool and use the process-wide provider clients, so concurrent callers share
+    warm connections instead of each starting a script.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, token: Optional[str] = None, router: Optional[Router] = None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.router = router or Router()
+        self.token = token
+        self.jobs: Dict[str, Job] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        os.makedirs(JOBS_DIR, exist_ok=True)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        for provider, client in CLIENTS.items():
+            if available(provider):
+                client()
+        for name in sorted(os.listdir(JOBS_DIR)):
+            path = os.path.join(JOBS_DIR, name, "job.json")
+            if not os.path.exists(path):
+                continue
+            try:
+                job = Job.load(path)
+            except (OSError, ValueError, KeyError):
+                continue
+            job.attach(loop)
+            if not job.done:
+                job.set_status("failed", "interrupted by a service restart")
+            self.jobs[job.id] = job
+
+    # Job processing (worker threads)
+
+    def export(self):
+        """Writes the traces, metrics and routing history gathered since the last export."""
+        tracer.export()
+        history.save()
+
+    async def export_periodically(self):
+        """Exports from this single task instead of from every job thread."""
+        while True:
+            await asyncio.sleep(EXPORT_INTERVAL)
+            await self.loop.run_in_executor(None, self.export)
+
+    def run_job(self, job: Job):
+        job.set_status("running")
+        try:
+            if job.kind == "audio":
+                text = self.transcribe(job)
+            elif job.source.endswith(".docx"):
+                text = read_docx(job.source)
+            else:
+                with open(job.source, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            if not text.strip():
+                raise ValueError("The transcript is empty")
+            self.assess(job, text)
+            job.set_status("done")
+        except SystemExit:
+            # Stage functions shared with the scripts print their error and exit
+            job.set_status("failed", "stage failed (see the service log)")
+        except Exception as e:
+            job.set_status("failed", f"{type(e).__name__}: {e}")
+
+    def transcribe(self, job: Job) -> str:
+        """Transcribes and summarizes the upload with the job's provider and writes the transcript formats."""
+        output_base = os.path.join(job.dir, f"{job.base_name}_{job.provider}")
+        with job.stage("transcription"):
+            duration = get_audio_duration(job.source)
+            if job.provider == "gemini":
+                from gemini_transcribe import process_with_gemini
+                model = self.router.choose("transcription", "gemini", audio_seconds=duration).model
+                transcript, summary, _, cost = process_with_gemini(job.source, model)
+                dialogue = transcript_from_text(transcript)
+            else:
+                from openai_transcribe import transcribe_audio, identify_speakers, summarize_transcript
+                segments, _, cost_t = transcribe_audio(job.source)
+                raw_tokens = count_tokens(segments.render(speakers=False), OPENAI_MODEL)
+                transcript, _, cost_d = identify_speakers(segments, self.router.choose("diarization", "openai", raw_tokens).model)
+                summary_tokens = count_tokens(transcript, OPENAI_MODEL)
+                summary, _, cost_s = summarize_transcript(transcript, self.router.choose("summary", "openai", summary_tokens).model)
+                dialogue = Transcript.from_text(transcript, segments.duration, timings=segments)
+                cost = cost_t + cost_d + cost_s
+            job.cost += cost
+            job.emit("transcript", text=transcript, summary=summary)
+
+        with job.stage("output"):
+            written = write_outputs(dialogue, summary, output_base, 'Conversation Summary & Transcript', job.formats)
+            index_transcript(written[0], dialogue)
+        for path in written:
+            job.add_artifact(path)
+        return transcript
+
+    def assess(self, job: Job, text: str):
+        """Runs the requested assessments on the transcript, then the Excel export."""
+        prefix = os.path.join(job.dir, f"{job.base_name}_{job.provider}")
+        in_tokens = count_tokens(text, DEFAULT_MODELS[job.provider])
+        for group in ("agent", "project"):
+            if group not in job.tasks:
+                continue
+            for task, category, name, suffix in ANALYSES[group]:
+                with job.stage(task):
+                    model = self.router.choose(task, job.provider, in_tokens=in_tokens).model
+                    system_prompt = load_prompt(category, name)
+                    with span("assessment", provider=job.provider, model=model, task=task) as s:
+                        content, metrics = complete(job.provider, model, system_prompt, USER_PREFIXES[group] + text)
+                        s.set(**metrics)
+                    job.cost += metrics["cost"]
+                    json_text = clean_markdown(content)
+                    json_path = f"{prefix}_{suffix}.json"
+                    save_json(json_text, json_path)
+                    try:
+                        data = json.loads(json_text)
+                    except ValueError:
+                        data = None
+                    job.emit("assessment", task=task, result=data if data is not None else json_text)
+                job.add_artifact(json_path)
+                if group == "agent" and isinstance(data, dict):
+                    docx_path = json_path.replace('.json', '.docx')
+                    save_assessment_docx(data, docx_path)
+                    job.add_artifact(docx_path)
+
+        if "export" in job.tasks and ("agent" in job.tasks or "project" in job.tasks):
+            from export_to_excel import export_assessment
+            with job.stage("export"):
+                workbook = export_assessment(job.base_name, job.dir, job.provider)
+            job.add_artifact(workbook)
+
+    # HTTP (event loop)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves requests on one connection until the client closes it (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, close=True)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                try:
+                    await self.dispatch(method, target, headers, reader, writer, keep_alive)
+                except HttpError as e:
+                    # The unread body of a rejected upload makes the connection unusable
+                    close = method == "POST"
+                    await self.respond(writer, e.status, {"error": str(e)}, close=close or not keep_alive)
+                    if close:
+                        break
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str], reader: asyncio.StreamReader,
+                       writer: asyncio.StreamWriter, keep_alive: bool):
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.split("/") if p]
+
+        if self.token and headers.get("authorization") != f"Bearer {self.token}":
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "Missing or invalid bearer token")
+
+        if parts == ["health"] and method == "GET":
+            queued = sum(1 for job in self.jobs.values() if job.status == "queued")
+            running = sum(1 for job in self.jobs.values() if job.status == "running")
+            return await self.respond(writer, HTTPStatus.OK, {"status": "ok", "queued": queued, "running": running},
+                                      close=not keep_alive)
+        if parts == ["jobs"] and method == "POST":
+            job = await self.submit(query, headers, reader)
+            return await self.respond(writer, HTTPStatus.ACCEPTED, job.to_dict(), close=not keep_alive,
+                                      headers={"Location": f"/jobs/{job.id}"})
+        if parts == ["jobs"] and method == "GET":
+            jobs = sorted(self.jobs.values(), key=lambda j: j.created, reverse=True)
+            return await self.respond(writer, HTTPStatus.OK, {"jobs": [job.to_dict() for job in jobs]},
+                                      close=not keep_alive)
+        if len(parts) >= 2 and parts[0] == "jobs" and method == "GET":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HttpError(HTTPStatus.NOT_FOUND, f"Job '{parts[1]}' not found")
+            if len(parts) == 2:
+                return await self.respond(writer, HTTPStatus.OK, job.to_dict(events="events" in query),
+                                          close=not keep_alive)
+            if len(parts) == 3 and parts[2] == "events":
+                after = query.get("after", "0")
+                if not after.isdigit():
+                    raise HttpError(HTTPStatus.BAD_REQUEST, "after must be an event count")
+                return await self.stream_events(job, int(after), writer)
+            if len(parts) == 4 and parts[2] == "artifacts":
+                return await self.send_artifact(job, parts[3], writer, keep_alive)
+        raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {method} {url.path}")
+
+    async def submit(self, query: Dict[str, str], headers: Dict[str, str], reader: asyncio.StreamReader) -> Job:
+        """Validates a submission, streams the request body to the job directory and queues the job."""
+        # Artifact names derive from the upload's name, so it is kept URL- and path-safe
+        filename = re.sub(r"[^\w.\-]", "_", os.path.basename(query.get("filename", "")))
+        if not re.fullmatch(r"[\w.\-]*[^.]\.\w+", filename):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Query parameter 'filename' (with extension) is required")
+        extension = os.path.splitext(filename)[1].lower()
+        kind = query.get("kind") or ("transcript" if extension in TRANSCRIPT_EXTENSIONS else "audio")
+        if kind not in ("audio", "transcript"):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "kind must be 'audio' or 'transcript'")
+        if kind == "transcript" and extension not in TRANSCRIPT_EXTENSIONS:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Transcripts must be {' or '.join(TRANSCRIPT_EXTENSIONS)} files")
+
+        provider = query.get("provider", "gemini")
+        if provider not in DEFAULT_MODELS:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Unknown provider '{provider}' (available: {', '.join(DEFAULT_MODELS)})")
+        if not available(provider):
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, f"{API_KEYS[provider]} is not configured on the service")
+        tasks = [t.strip() for t in query.get("tasks", ",".join(TASKS)).split(",") if t.strip()]
+        unknown = [t for t in tasks if t not in TASKS]
+        if unknown:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Unknown task(s): {', '.join(unknown)} (available: {', '.join(TASKS)})")
+        try:
+            formats = parse_formats(query.get("formats", "docx"))
+        except ValueError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        try:
+            self.router.check()
+        except BudgetExceeded as e:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+
+        if not headers.get("content-length", "").isdigit():
+            raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required")
+        length = int(headers["content-length"])
+        if length == 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "The request body (the file) is empty")
+        if length > MAX_UPLOAD_BYTES:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Uploads are limited to {MAX_UPLOAD_BYTES} bytes")
+
+        job = Job(uuid.uuid4().hex[:12], kind, provider, filename, tasks, formats)
+        os.makedirs(job.dir, exist_ok=True)
+        try:
+            with open(job.source, 'wb') as f:
+                remaining = length
+                while remaining:
+                    chunk = await reader.read(min(READ_CHUNK, remaining))
+                    if not chunk:
+                        raise ConnectionError("Upload interrupted")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except ConnectionError:
+            shutil.rmtree(job.dir, ignore_errors=True)
+            raise
+
+        job.attach(self.loop)
+        self.jobs[job.id] = job
+        job.emit("status", status="queued")
+        print(f"      Job {job.id}: {kind} '{filename}' ({length} bytes) queued on {provider}.")
+        self.loop.run_in_executor(self.executor, self.run_job, job)
+        return job
+
+    async def stream_events(self, job: Job, after: int, writer: asyncio.StreamWriter):
+        """Streams the job's events as chunked NDJSON until the job finishes."""
+        writer.write(self.head(HTTPStatus.OK, {"Content-Type": "application/x-ndjson; charset=utf-8",
+                                                "Transfer-Encoding": "chunked", "Cache-Control": "no-cache"}))
+        seen = max(0, after)
+        while True:
+            await job.wait(seen)
+            with job._lock:
+                pending = job.events[seen:]
+            seen += len(pending)
+            if pending:
+                data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in pending).encode("utf-8")
+                writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                await writer.drain()
+            if job.done and seen >= len(job.events):
+                break
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def send_artifact(self, job: Job, name: str, writer: asyncio.StreamWriter, keep_alive: bool):
+        if name not in job.artifacts:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Job '{job.id}' has no artifact '{name}'")
+        path = os.path.join(job.dir, name)
+        size = os.path.getsize(path)
+        writer.write(self.head(HTTPStatus.OK, {
+            "Content-Type": CONTENT_TYPES.get(os.path.splitext(name)[1], "application/octet-stream"),
+            "Content-Length": str(size),
+            "Content-Disposition": f'attachment; filename="{name}"',
+            "Connection": "keep-alive" if keep_alive else "close",
+        }))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(READ_CHUNK), b""):
+                writer.write(block)
+                await writer.drain()
+
+    @staticmethod
+    def head(status: int, headers: Dict[str, str]) -> bytes:
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"] + [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, payload: dict, close: bool = False,
+                      headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        writer.write(self.head(status, {
+            "Content-Type": "application/json; charset=utf-8",
+            "Content-Length": str(len(body)),
+            "Connection": "close" if close else "keep-alive",
+            **(headers or {}),
+        }) + body)
+        await writer.drain()
+
+async def serve(host: str, port: int, workers: int, token: Optional[str], router: Router):
+    service = JobService(workers, token, router)
+    service.start(asyncio.get_running_loop())
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_BYTES)
+    exporter = asyncio.create_task(service.export_periodically())
+    print(f"Job service listening on http://{host}:{port} ({workers} workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        exporter.cancel()
+        service.executor.shutdown(wait=False, cancel_futures=True)
+        service.export()
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP service for submitting recordings and transcripts as jobs.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Jobs processed concurrently")
+    add_arguments(parser)
+
+    args = parser.parse_args()
+    token = os.getenv(TOKEN_ENV)
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not token:
+        print(f"Warning: Listening on {args.host} without {TOKEN_ENV}; anyone who can reach it can spend API credit.")
+    if not any(available(provider) for provider in DEFAULT_MODELS):
+        print(f"Error: None of {', '.join(API_KEYS.values())} is set.")
+        sys.exit(1)
+
+    try:
+        router = from_args(args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, token, router))
+    except KeyboardInterrupt:
+        print("\nJob service stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import sqlite3
+from typing import Callable, Dict, List, Optional
+
+from tracing import tracer
+from utils import content_hash
+
+STAGES_PATH = os.path.join("outputs", "stages.sqlite")
+
+def stage_inputs(files: Dict[str, str], **values) -> dict:
+    """
+    The inputs a stage output depends on: the SHA-256 of each input file (None while it is
+    missing) plus plain values such as the model id.
+    """
+    inputs = {name: content_hash(path) if os.path.exists(path) else None for name, path in files.items()}
+    inputs.update(values)
+    return inputs
+
+class StageStore:
+    """
+    Make-style record of stage outputs: for each output file, the stage that wrote it and
+    the inputs it was computed from. A stage only reruns when one of its outputs is missing
+    or one of its inputs (audio, upstream artifact, prompt file, model id) has changed.
+    """
+
+    def __init__(self, path: str = STAGES_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS outputs (path TEXT PRIMARY KEY, stage TEXT, inputs TEXT, updated REAL)
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def stale(self, stage: str, outputs: List[str], inputs: dict,
+              preferred_fits: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """
+        Why the stage has to run for these outputs, or None when all of them are up to date.
+        An output made by a degraded route stays up to date only while preferred_fits()
+        says the configured model still cannot be afforded.
+        """
+        degraded = None
+        for path in outputs:
+            name = os.path.basename(path)
+            if not os.path.exists(path):
+                return f"{name} is missing"
+            row = self.db.execute("SELECT stage, inputs FROM outputs WHERE path = ?", (os.path.abspath(path),)).fetchone()
+            if row is None or row[0] != stage:
+                return f"{name} has no recorded inputs"
+            recorded = json.loads(row[1])
+            degraded = degraded or recorded.pop("degraded", None)
+            changed = sorted(k for k in set(inputs) | set(recorded) if inputs.get(k) != recorded.get(k))
+            if changed:
+                return f"{', '.join(changed)} changed"
+        if degraded and (preferred_fits is None or preferred_fits()):
+            return f"made with {degraded} instead of {inputs.get('model')}"
+        return None
+
+    def up_to_date(self, stage: str, outputs: List[str], inputs: dict, force: bool = False,
+                   preferred_fits: Optional[Callable[[], bool]] = None) -> bool:
+        """True when the stage can be skipped; otherwise prints why it runs."""
+        reason = "forced" if force else self.stale(stage, outputs, inputs, preferred_fits)
+        if reason is None:
+            tracer.count("stages_skipped_total", stage=stage)
+            return True
+        print(f"      {stage}: computing ({reason}).")
+        return False
+
+    def record(self, stage: str, outputs: List[str], inputs: dict, model: Optional[str] = None):
+        """
+        Registers freshly written outputs with the inputs they were computed from. model is
+        the one actually used, when the router degraded the configured one.
+        """
+        if model and model != inputs.get("model"):
+            inputs = dict(inputs, degraded=model)
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?)",
+                [(os.path.abspath(path), stage, json.dumps(inputs, sort_keys=True), now) for path in outputs],
+            )
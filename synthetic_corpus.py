@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import math
+import wave
+import random
+import argparse
+from array import array
+from typing import Dict, List, Optional
+
+from utils import format_timecode
+
+CORPUS_DIR = os.path.join("outputs", "bench_corpus")
+
+# Call lengths in seconds: mostly short support calls, a few long interviews
+DEFAULT_DURATIONS = [45, 60, 90, 120, 150, 180, 300, 600]
+DEFAULT_SEED = 42
+SAMPLE_RATE = 16000
+
+# Seconds per spoken line and amplitude levels used to build the speech-like envelope
+LINE_SECONDS = (2.0, 7.0)
+FRAME_SECONDS = 0.1
+LEVELS = 16
+
+DARIJA = (
+    "salam", "labas", "wach", "kayn", "chi", "mochkil", "f", "l'facture", "dyal", "l'internet", "bghit",
+    "nbeddel", "l'offre", "daba", "ghadi", "nchouf", "m3ak", "safi", "hamdoullah", "smhli", "3afak",
+    "chhal", "kat5ales", "f", "chhar", "mzyan", "bzaf", "walakin", "ma", "khdamch", "lyoum", "ghir",
+    "sber", "chwiya", "3tini", "numero", "dyalek", "wakha", "ana", "nta", "hna", "tma", "3lach",
+)
+FRENCH = (
+    "bonjour", "monsieur", "madame", "d'accord", "votre", "dossier", "est", "en", "cours", "le",
+    "remboursement", "sera", "effectué", "la", "connexion", "coupure", "réclamation", "abonnement",
+    "je", "vais", "vérifier", "merci", "pour", "patience", "rendez-vous", "technicien", "demain",
+)
+ENGLISH = ("ok", "the", "system", "update", "ticket", "check", "problem", "offer", "support")
+
+VERDICTS = ("Excellent", "Good", "Average", "Poor")
+CRITERIA = ("professionalism_and_tone", "clarity_of_information", "problem_solving_and_helpfulness",
+            "respect_for_xplorer", "overall_effectiveness")
+
+def sentence(rng: random.Random, words: int) -> str:
+    """A code-switched line: mostly Darija, some French, a little English."""
+    out = []
+    for _ in range(words):
+        roll = rng.random()
+        vocab = DARIJA if roll < 0.6 else FRENCH if roll < 0.92 else ENGLISH
+        out.append(rng.choice(vocab))
+    text = " ".join(out)
+    return text[0].upper() + text[1:] + rng.choice((".", ".", "?", "!"))
+
+def transcript_lines(rng: random.Random, duration: float) -> List[dict]:
+    """Timed dialogue lines (start, end, speaker, text) covering `duration` seconds."""
+    lines = []
+    t = 0.0
+    speaker = 0
+    while t < duration - 1:
+        length = min(rng.uniform(*LINE_SECONDS), duration - t)
+        lines.append({
+            "start": round(t, 2), "end": round(t + length, 2),
+            "speaker": f"Speaker {'AB'[speaker]}",
+            "text": sentence(rng, max(3, int(length * 2.5))),
+        })
+        t += length + rng.uniform(0.1, 0.8)
+        # Agents and callers alternate, with the occasional back-to-back line
+        speaker = speaker if rng.random() < 0.2 else 1 - speaker
+    return lines
+
+def render_transcript(lines: List[dict]) -> str:
+    return "\n".join(f"{format_timecode(l['start'])} {l['speaker']}: {l['text']}" for l in lines)
+
+def write_audio(path: str, rng: random.Random, lines: List[dict], duration: float):
+    """
+    Writes a 16 kHz mono PCM WAV: voiced frames (a pitch that changes per line) during
+    lines, near-silence between them. Frames are assembled from pre-rendered amplitude
+    levels, so even 10-minute files are generated quickly.
+    """
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    pitches = (140.0, 210.0)
+    rendered: Dict[tuple, bytes] = {}
+
+    def voiced(pitch: float, level: int) -> bytes:
+        key = (pitch, level)
+        if key not in rendered:
+            amplitude = 12000 * level / LEVELS
+            rendered[key] = array('h', (
+                int(amplitude * (0.7 * math.sin(2 * math.pi * pitch * i / SAMPLE_RATE)
+                                 + 0.3 * math.sin(2 * math.pi * 2.7 * pitch * i / SAMPLE_RATE)))
+                for i in range(frame)
+            )).tobytes()
+        return rendered[key]
+
+    noise = array('h', (rng.randint(-60, 60) for _ in range(frame))).tobytes()
+    frames = []
+    spans = [(l["start"], l["end"], pitches[l["speaker"].endswith("B")]) for l in lines]
+    current = 0
+    for i in range(int(duration / FRAME_SECONDS)):
+        t = i * FRAME_SECONDS
+        while current < len(spans) and spans[current][1] < t:
+            current += 1
+        if current < len(spans) and spans[current][0] <= t:
+            frames.append(voiced(spans[current][2], rng.randint(LEVELS // 4, LEVELS)))
+        else:
+            frames.append(noise)
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(b"".join(frames))
+
+def agent_assessment(rng: random.Random, lines: List[dict]) -> dict:
+    ratings = {criterion: rng.choice(VERDICTS) for criterion in CRITERIA}
+    return {
+        "call_summary": " ".join(l["text"] for l in lines[:3]),
+        "agent_performance": ratings,
+        "final_verdict": max(ratings.values(), key=list(ratings.values()).count),
+    }
+
+def notations(rng: random.Random, project: str) -> dict:
+    def section(names):
+        criteria = {name: rng.randint(1, 5) for name in names}
+        return criteria, round(sum(criteria.values()) / len(criteria), 1)
+
+    idea, idea_potential = section(("clarity_of_problem", "solution_problem_fit", "desirability",
+                                    "feasibility", "solution_potential"))
+    team, team_potential = section(("team_complementarity", "founder_potential"))
+    pilot, pilot_potential = section(("investment_for_pilot_score", "speed_of_pilot_score"))
+    return {
+        "project": project,
+        "idea": {"criteria": idea, "idea_potential": idea_potential},
+        "team": {"criteria": team, "team_potential": team_potential},
+        "pilot": {"criteria": pilot, "pilot_potential": pilot_potential},
+        "category": rng.choice("ABCDEF"),
+        "category_interpretation": "Quick wins",
+        "operational_reading": "Valider le pilote. Recruter un profil technique.",
+    }
+
+def qualitative(rng: random.Random, project: str) -> dict:
+    return {
+        "project": project,
+        "problem_validation": {"problem_validated": rng.choice(("Oui", "Non", "En cours de validation"))},
+        "solution_evaluation": {
+            "mvp_duration": rng.choice(("1 à 3 mois", "3 à 6 mois", "6 à 12 mois")),
+            "customers_consulted": rng.choice(("Oui", "Non")),
+            "commercial_potential_outside_ocp_morocco": rng.choice(("Oui", "Non", "Peut-être")),
+            "mvp_budget": rng.choice(("Moins de 100 000 MAD", "100 000 - 500 000 MAD")),
+            "situation_stage": rng.choice(("Idée", "Prototype en cours", "MVP validé")),
+        },
+        "team_and_skills": {"team_status": "Solide et alignée", "team_has_key_skills": rng.choice(("Oui", "Partiellement"))},
+        "overall_situation": {"situation_status": "Active", "support_path": rng.choice(("Demo Day", "Podcast", "Autre"))},
+        "strategic_fit": {"strategic_fit_ocp": rng.choice(("Oui", "Non"))},
+    }
+
+def generate(out_dir: str = CORPUS_DIR, durations: Optional[List[float]] = None, seed: int = DEFAULT_SEED,
+             audio: bool = True, docx: bool = True) -> dict:
+    """
+    Writes a reproducible corpus (same seed, same bytes) and returns its manifest:
+    per call a WAV file, the transcript (.txt and .docx), and the three assessment JSONs
+    that export_to_excel.py reads.
+    """
+    durations = durations or DEFAULT_DURATIONS
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"seed": seed, "calls": []}
+    for i, duration in enumerate(durations):
+        rng = random.Random(seed * 1000 + i)
+        name = f"call_{i:03d}_{int(duration)}s"
+        base = os.path.join(out_dir, name)
+        lines = transcript_lines(rng, duration)
+        text = render_transcript(lines)
+        entry = {"name": name, "duration": duration, "lines": lines, "transcript_txt": base + ".txt"}
+
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            f.write(text)
+        if audio:
+            write_audio(base + ".wav", rng, lines, duration)
+            entry["audio"] = base + ".wav"
+        if docx:
+            from utils import save_docx
+            save_docx(text, " ".join(l["text"] for l in lines[:2]), base + ".docx", "Conversation Summary & Transcript")
+            entry["transcript_docx"] = base + ".docx"
+
+        for kind, data in (("assessment", agent_assessment(rng, lines)),
+                           ("notations", notations(rng, name)),
+                           ("qualitative", qualitative(rng, name))):
+            path = f"{base}_gemini_{kind}.json"
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            entry[kind] = path
+        manifest["calls"].append(entry)
+
+    with open(os.path.join(out_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic call corpus for benchmarks.")
+    parser.add_argument("--out", default=CORPUS_DIR, help="Output directory")
+    parser.add_argument("--durations", default=",".join(str(d) for d in DEFAULT_DURATIONS),
+                        help="Comma-separated call lengths in seconds")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument("--no-audio", action="store_true", help="Skip WAV files")
+
+    args = parser.parse_args()
+    try:
+        durations = [float(d) for d in args.durations.split(",") if d.strip()]
+    except ValueError:
+        print(f"Error: Invalid durations '{args.durations}'.")
+        sys.exit(1)
+
+    manifest = generate(args.out, durations, args.seed, audio=not args.no_audio)
+    total = sum(c["duration"] for c in manifest["calls"])
+    print(f"SUCCESS: {len(manifest['calls'])} calls ({total / 60:.1f} min of audio) written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: exports from concurrent processes are not serialized
+    fcntl = None
+
+TRACE_DIR = os.getenv("TRACE_DIR", "outputs")
+TRACE_FILE = "traces.jsonl"
+METRICS_FILE = "metrics.prom"
+METRICS_STATE_FILE = "metrics_state.json"
+METRIC_PREFIX = "speech2text"
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Numeric span attributes that are also accumulated as throughput counters
+COUNTED_ATTRIBUTES = {
+    "file_size": "bytes_total",
+    "audio_seconds": "audio_seconds_total",
+    "in_tokens": "input_tokens_total",
+    "cached_tokens": "cached_input_tokens_total",
+    "out_tokens": "output_tokens_total",
+    "cost": "cost_dollars_total",
+}
+
+# Span attributes promoted to metric labels
+LABEL_ATTRIBUTES = ("provider", "model", "task")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+class Span:
+    """A single timed stage of the pipeline."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.error = None
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set(self, **attributes):
+        """Adds or overrides attributes on the span."""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+class Tracer:
+    """Records stage spans and aggregates them into counters and histograms."""
+
+    def __init__(self, trace_dir: str = TRACE_DIR):
+        self.trace_dir = trace_dir
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, dict]] = {}
+        self.listeners = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Registers a callable invoked with every finished span."""
+        self.listeners.append(listener)
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Times the enclosed block as a stage span, recording failures (including sys.exit)."""
+        stack = self._stack()
+        parent_id = stack[-1].span_id if stack else None
+        current = Span(name, self.trace_id, parent_id, attributes)
+        stack.append(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.status = "error"
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.end = time.time()
+            stack.pop()
+            self._record(current)
+
+    def _record(self, span: Span):
+        labels = {"stage": span.name}
+        for attr in LABEL_ATTRIBUTES:
+            if span.attributes.get(attr) is not None:
+                labels[attr] = span.attributes[attr]
+
+        with self._lock:
+            self.spans.append(span)
+        self.observe("stage_duration_seconds", span.duration, **labels)
+        self.count("stage_runs_total", 1, status=span.status, **labels)
+        for attr, counter in COUNTED_ATTRIBUTES.items():
+            value = span.attributes.get(attr)
+            if isinstance(value, (int, float)) and value:
+                self.count(counter, value, **labels)
+        for listener in self.listeners:
+            listener(span)
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Increments a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Records a value into a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+                series[key] = hist
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def _load_state(self, path: str) -> Tuple[dict, dict]:
+        """Loads counters and histograms accumulated by previous runs."""
+        if not os.path.exists(path):
+            return {}, {}
+        try:
+            with open(path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+        counters = {
+            name: {tuple(map(tuple, s["labels"])): s["value"] for s in series}
+            for name, series in state.get("counters", {}).items()
+        }
+        histograms = {
+            name: {tuple(map(tuple, s["labels"])): s["hist"] for s in series}
+            for name, series in state.get("histograms", {}).items()
+        }
+        return counters, histograms
+
+    def _merged(self, path: str, counters_new: dict, histograms_new: dict) -> Tuple[dict, dict]:
+        counters, histograms = self._load_state(path)
+        for name, series in counters_new.items():
+            merged = counters.setdefault(name, {})
+            for key, value in series.items():
+                merged[key] = merged.get(key, 0.0) + value
+        for name, series in histograms_new.items():
+            merged = histograms.setdefault(name, {})
+            for key, hist in series.items():
+                if key not in merged or len(merged[key]["buckets"]) != len(hist["buckets"]):
+                    merged[key] = {"buckets": list(hist["buckets"]), "sum": hist["sum"], "count": hist["count"]}
+                    continue
+                prev = merged[key]
+                prev["buckets"] = [a + b for a, b in zip(prev["buckets"], hist["buckets"])]
+                prev["sum"] += hist["sum"]
+                prev["count"] += hist["count"]
+        return counters, histograms
+
+    def export(self):
+        """Appends new spans to the JSONL trace and rewrites the Prometheus text file."""
+        # Take everything recorded so far in one step; later spans and counts go to fresh containers
+        with self._lock:
+            pending, counters_new, histograms_new = self.spans, self.counters, self.histograms
+            if not pending and not counters_new and not histograms_new:
+                return
+            self.spans = []
+            self.counters = {}
+            self.histograms = {}
+
+        os.makedirs(self.trace_dir, exist_ok=True)
+        state_path = os.path.join(self.trace_dir, METRICS_STATE_FILE)
+        # Other processes export into the same files: read-merge-write under a file lock
+        with file_lock(state_path):
+            with open(os.path.join(self.trace_dir, TRACE_FILE), 'a') as f:
+                for span in pending:
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+            counters, histograms = self._merged(state_path, counters_new, histograms_new)
+            tmp_path = state_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    "counters": {
+                        name: [{"labels": list(key), "value": value} for key, value in series.items()]
+                        for name, series in counters.items()
+                    },
+                    "histograms": {
+                        name: [{"labels": list(key), "hist": hist} for key, hist in series.items()]
+                        for name, series in histograms.items()
+                    },
+                }, f)
+            os.replace(tmp_path, state_path)
+
+            prom_path = os.path.join(self.trace_dir, METRICS_FILE)
+            tmp_path = prom_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(format_prometheus(counters, histograms))
+            os.replace(tmp_path, prom_path)
+
+@contextmanager
+def file_lock(path: str):
+    """Holds an exclusive lock on path + ".lock" across processes (not serialized without fcntl)."""
+    with open(path + ".lock", 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+def format_prometheus(counters: dict, histograms: dict) -> str:
+    """Renders counters and histograms in the Prometheus text exposition format."""
+    lines = []
+    for name in sorted(counters):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} counter")
+        for key, value in sorted(counters[name].items()):
+            lines.append(f"{metric}{_format_labels(key)} {float(value)!r}")
+    for name in sorted(histograms):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} histogram")
+        for key, hist in sorted(histograms[name].items()):
+            for bound, count in zip(LATENCY_BUCKETS, hist["buckets"]):
+                lines.append(f"{metric}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(key, (('le', '+Inf'),))} {hist['count']}")
+            lines.append(f"{metric}_sum{_format_labels(key)} {hist['sum']:.6f}")
+            lines.append(f"{metric}_count{_format_labels(key)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+# Shared tracer for the running script; exported on exit so failed runs are traced too
+tracer = Tracer()
+span = tracer.span
+atexit.register(tracer.export)
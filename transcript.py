@@ -0,0 +1,215 @@
+import re
+import math
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from utils import clean_markdown
+
+NO_SPEAKER = -1
+
+# Duration given to a cue when the next timecode is not later than its own
+MIN_CUE_SECONDS = 1.0
+
+# "[00:01:02] Speaker A: text", "00:01:02 - Speaker A - text", "01:02 Speaker A: text", ...
+LINE_PATTERN = re.compile(
+    r"^\[?(?:(\d{1,2}):)?(\d{1,2}):(\d{2})(?:[.,]\d+)?\]?\s*[-–:,]?\s*"
+    r"(?:(Speaker\s+\w+)\s*[-–:,]?\s*|([\w .']{1,25}?):\s+)?(.*)$"
+)
+
+class Segment(NamedTuple):
+    start: Optional[float]
+    end: Optional[float]
+    speaker: Optional[str]
+    text: str
+
+def parse_line(line: str) -> Segment:
+    """Splits a formatted transcript line into timecode, speaker and caption."""
+    match = LINE_PATTERN.match(line)
+    if not match:
+        return Segment(None, None, None, line)
+    hours, minutes, secs, speaker, other_speaker, text = match.groups()
+    speaker = speaker or other_speaker
+    start = int(hours or 0) * 3600 + int(minutes) * 60 + int(secs)
+    return Segment(float(start), None, speaker.strip() if speaker else None, text.strip())
+
+def iter_segments(transcript: str, duration: float = 0.0) -> Iterator[Segment]:
+    """Yields cleaned transcript segments with end times, looking ahead one timed line."""
+    pending = None
+    for line in transcript.split('\n'):
+        if not line.strip():
+            continue
+        seg = parse_line(clean_markdown(line))
+        if seg.start is None:
+            # Untimed lines continue the previous caption
+            if pending is not None:
+                pending = pending._replace(text=f"{pending.text} {seg.text}")
+            else:
+                yield seg
+            continue
+        if pending is not None:
+            yield pending._replace(end=max(seg.start, pending.start + MIN_CUE_SECONDS))
+        pending = seg
+    if pending is not None:
+        yield pending._replace(end=max(duration, pending.start + MIN_CUE_SECONDS))
+
+def format_timecodes(seconds: Sequence[float]) -> List[str]:
+    """Formats many offsets into [HH:MM:SS] at once (same output as utils.format_timecode)."""
+    whole = [int(s) for s in seconds]
+    return [f"[{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}]" for s in whole]
+
+class Transcript:
+    """
+    Columnar transcript: parallel start/end/speaker arrays and (start, end) offsets
+    into one shared text buffer. Slices share the buffer and the underlying arrays,
+    so chunking a multi-hour call does not copy any caption text. An untimed segment
+    has a NaN end; its start repeats the previous one only to keep the column sorted.
+    """
+
+    def __init__(self, starts, ends, speaker_ids, text_starts, text_ends, buffer: str, speakers: List[str]):
+        self.starts = starts
+        self.ends = ends
+        self.speaker_ids = speaker_ids
+        self.text_starts = text_starts
+        self.text_ends = text_ends
+        self.buffer = buffer
+        self.speakers = speakers
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Segment]) -> "Transcript":
+        """Builds a transcript in one pass over (start, end, speaker, text) segments."""
+        starts, ends = array('d'), array('d')
+        speaker_ids = array('h')
+        text_starts, text_ends = array('Q'), array('Q')
+        parts = []
+        speakers: List[str] = []
+        speaker_index = {}
+        offset = 0
+        last_start = 0.0
+        for seg in segments:
+            if seg.start is None:
+                # Untimed: sorts with the previous offset, and the NaN end marks it as having no timing
+                start, end = last_start, math.nan
+            else:
+                start = seg.start
+                end = seg.end if seg.end is not None else start
+            last_start = start
+            if seg.speaker:
+                if seg.speaker not in speaker_index:
+                    speaker_index[seg.speaker] = len(speakers)
+                    speakers.append(seg.speaker)
+                speaker_ids.append(speaker_index[seg.speaker])
+            else:
+                speaker_ids.append(NO_SPEAKER)
+            text = seg.text.strip()
+            starts.append(start)
+            ends.append(end)
+            text_starts.append(offset)
+            offset += len(text)
+            text_ends.append(offset)
+            parts.append(text)
+        return cls(starts, ends, speaker_ids, text_starts, text_ends, "".join(parts), speakers)
+
+    @classmethod
+    def from_whisper_segments(cls, segments: list) -> "Transcript":
+        """Builds a transcript from Whisper verbose_json segments (objects or dicts)."""
+        def fields(s):
+            if isinstance(s, dict):
+                return Segment(s["start"], s["end"], None, s["text"])
+            return Segment(s.start, s.end, None, s.text)
+        return cls.from_segments(fields(s) for s in segments)
+
+    @classmethod
+    def from_text(cls, text: str, duration: float = 0.0, timings: Optional["Transcript"] = None) -> "Transcript":
+        """
+        Parses a formatted "[HH:MM:SS] Speaker X: caption" transcript.
+        When `timings` has the same number of segments (e.g. the Whisper segments the
+        text was diarized from), its sub-second start/end times are kept.
+        """
+        transcript = cls.from_segments(iter_segments(text, duration))
+        if timings is not None and len(timings) == len(transcript):
+            transcript.starts = array('d', timings.starts)
+            transcript.ends = array('d', timings.ends)
+        return transcript
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def speaker(self, i: int) -> Optional[str]:
+        sid = self.speaker_ids[i]
+        return self.speakers[sid] if sid != NO_SPEAKER else None
+
+    def text(self, i: int) -> str:
+        return self.buffer[self.text_starts[i]:self.text_ends[i]]
+
+    def timed(self, i: int) -> bool:
+        return not math.isnan(self.ends[i])
+
+    def __getitem__(self, i: int) -> Segment:
+        if i < 0:
+            i += len(self)
+        if not self.timed(i):
+            return Segment(None, None, self.speaker(i), self.text(i))
+        return Segment(self.starts[i], self.ends[i], self.speaker(i), self.text(i))
+
+    def __iter__(self) -> Iterator[Segment]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def duration(self) -> float:
+        return max((end for end in self.ends if not math.isnan(end)), default=0.0)
+
+    def view(self, i: int, j: int) -> "Transcript":
+        """Zero-copy view of segments [i, j)."""
+        return Transcript(
+            memoryview(self.starts)[i:j], memoryview(self.ends)[i:j], memoryview(self.speaker_ids)[i:j],
+            memoryview(self.text_starts)[i:j], memoryview(self.text_ends)[i:j], self.buffer, self.speakers,
+        )
+
+    def slice_time(self, start: float = 0.0, end: Optional[float] = None) -> "Transcript":
+        """View of the segments starting within [start, end) seconds."""
+        i = bisect_left(self.starts, start)
+        j = len(self) if end is None else bisect_left(self.starts, end, i)
+        return self.view(i, j)
+
+    def by_speaker(self, speaker: str) -> "Transcript":
+        """Segments spoken by one speaker; columns are filtered, the text buffer is shared."""
+        if speaker not in self.speakers:
+            return self.view(0, 0)
+        sid = self.speakers.index(speaker)
+        keep = [i for i, s in enumerate(self.speaker_ids) if s == sid]
+        return Transcript(
+            array('d', (self.starts[i] for i in keep)), array('d', (self.ends[i] for i in keep)),
+            array('h', (sid for _ in keep)),
+            array('Q', (self.text_starts[i] for i in keep)), array('Q', (self.text_ends[i] for i in keep)),
+            self.buffer, self.speakers,
+        )
+
+    def chunks(self, max_chars: int = 0, max_seconds: float = 0.0) -> Iterator["Transcript"]:
+        """Splits into consecutive zero-copy views bounded by caption characters and/or duration."""
+        n = len(self)
+        i = 0
+        while i < n:
+            limit = n
+            if max_seconds:
+                # Timecodes are sorted, so the duration bound is a binary search
+                limit = max(i + 1, bisect_left(self.starts, self.starts[i] + max_seconds, i))
+            chars = self.text_ends[i] - self.text_starts[i]
+            j = i + 1
+            while j < limit and (not max_chars or chars + self.text_ends[j] - self.text_starts[j] <= max_chars):
+                chars += self.text_ends[j] - self.text_starts[j]
+                j += 1
+            yield self.view(i, j)
+            i = j
+
+    def render(self, speakers: bool = True) -> str:
+        """Renders "[HH:MM:SS] Speaker X: caption" lines with a single join."""
+        codes = format_timecodes(self.starts)
+        lines = []
+        for i, code in enumerate(codes):
+            speaker = self.speaker(i) if speakers else None
+            label = f"{speaker}: " if speaker else ""
+            clock = f"{code} " if self.timed(i) else ""
+            lines.append(f"{clock}{label}{self.text(i)}\n")
+        return "".join(lines)
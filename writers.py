@@ -0,0 +1,173 @@
+import os
+import html
+from typing import Dict, List, Union
+
+from utils import clean_markdown
+from tracing import span
+from transcript import Segment, Transcript, iter_segments
+
+DEFAULT_FORMATS = ["docx"]
+
+def _clock(seconds: float, separator: str) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+def _label(seg: Segment) -> str:
+    clock = f"[{_clock(seg.start, '.')[:8]}] " if seg.start is not None else ""
+    speaker = f"{seg.speaker}: " if seg.speaker else ""
+    return f"{clock}{speaker}{seg.text}"
+
+class Writer:
+    """Base class for output writers fed one segment at a time."""
+    extension = ""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+
+    def begin(self, title: str, summary: str):
+        pass
+
+    def write(self, seg: Segment):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class TextWriter(Writer):
+    """Writer that streams into a plain text file."""
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.f = open(output_path, 'w', encoding='utf-8')
+
+    def close(self):
+        self.f.close()
+
+class SrtWriter(TextWriter):
+    extension = ".srt"
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        self.index = 0
+
+    def write(self, seg: Segment):
+        if seg.start is None:
+            return
+        self.index += 1
+        speaker = f"{seg.speaker}: " if seg.speaker else ""
+        self.f.write(f"{self.index}\n{_clock(seg.start, ',')} --> {_clock(seg.end, ',')}\n{speaker}{seg.text}\n\n")
+
+class VttWriter(TextWriter):
+    extension = ".vtt"
+
+    def begin(self, title: str, summary: str):
+        self.f.write(f"WEBVTT - {title}\n\n")
+
+    def write(self, seg: Segment):
+        if seg.start is None:
+            return
+        voice = f"<v {html.escape(seg.speaker, quote=False)}>" if seg.speaker else ""
+        text = html.escape(seg.text, quote=False)
+        self.f.write(f"{_clock(seg.start, '.')} --> {_clock(seg.end, '.')}\n{voice}{text}\n\n")
+
+class MarkdownWriter(TextWriter):
+    extension = ".md"
+
+    def begin(self, title: str, summary: str):
+        self.f.write(f"# {title}\n\n")
+        if summary:
+            self.f.write(f"## Summary\n\n{clean_markdown(summary)}\n\n")
+        self.f.write("## Transcript\n\n")
+
+    def write(self, seg: Segment):
+        clock = f"`{_clock(seg.start, '.')[:8]}` " if seg.start is not None else ""
+        speaker = f"**{seg.speaker}:** " if seg.speaker else ""
+        self.f.write(f"{clock}{speaker}{seg.text}\n\n")
+
+class HtmlWriter(TextWriter):
+    extension = ".html"
+
+    def begin(self, title: str, summary: str):
+        title = html.escape(title)
+        self.f.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n</head>\n<body>\n<h1>{title}</h1>\n")
+        if summary:
+            paragraphs = "".join(f"<p>{html.escape(p)}</p>\n" for p in clean_markdown(summary).split('\n') if p)
+            self.f.write(f"<h2>Summary</h2>\n{paragraphs}")
+        self.f.write("<h2>Transcript</h2>\n")
+
+    def write(self, seg: Segment):
+        clock = f"<time>{_clock(seg.start, '.')[:8]}</time> " if seg.start is not None else ""
+        speaker = f"<b>{html.escape(seg.speaker)}:</b> " if seg.speaker else ""
+        self.f.write(f"<p>{clock}{speaker}{html.escape(seg.text)}</p>\n")
+
+    def close(self):
+        self.f.write("</body>\n</html>\n")
+        super().close()
+
+class DocxWriter(Writer):
+    extension = ".docx"
+
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        # Only pay for python-docx when a Word file is requested
+        from docx import Document
+        self.doc = Document()
+
+    def begin(self, title: str, summary: str):
+        self.doc.add_heading(title, 0)
+        if summary:
+            self.doc.add_heading('Summary', level=1)
+            self.doc.add_paragraph(clean_markdown(summary))
+            self.doc.add_page_break()
+        self.doc.add_heading('Transcript', level=1)
+
+    def write(self, seg: Segment):
+        self.doc.add_paragraph(_label(seg))
+
+    def close(self):
+        self.doc.save(self.output_path)
+
+WRITERS: Dict[str, type] = {
+    "docx": DocxWriter,
+    "srt": SrtWriter,
+    "vtt": VttWriter,
+    "md": MarkdownWriter,
+    "html": HtmlWriter,
+}
+
+def parse_formats(value: str) -> List[str]:
+    """Parses a comma-separated --formats value, rejecting unknown formats."""
+    formats = [f.strip().lower().lstrip('.') for f in value.split(',') if f.strip()]
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)} (available: {', '.join(WRITERS)})")
+    return formats or list(DEFAULT_FORMATS)
+
+def write_outputs(transcript: Union[str, Transcript], summary: str, base_path: str, title: str,
+                  formats: List[str] = DEFAULT_FORMATS, duration: float = 0.0) -> List[str]:
+    """
+    Writes the transcript in every requested format in a single pass over its segments.
+    A formatted transcript string is parsed line by line as it is written.
+    """
+    if isinstance(transcript, Transcript):
+        source, chars = iter(transcript), len(transcript.buffer)
+    else:
+        source, chars = iter_segments(transcript or "", duration), len(transcript or "")
+    writers = [WRITERS[fmt](base_path + WRITERS[fmt].extension) for fmt in formats]
+    with span("output_write", formats=",".join(formats), chars=chars) as s:
+        try:
+            for writer in writers:
+                writer.begin(title, summary)
+            segments = 0
+            for seg in source:
+                for writer in writers:
+                    writer.write(seg)
+                segments += 1
+        finally:
+            for writer in writers:
+                writer.close()
+        s.set(segments=segments, file_size=sum(os.path.getsize(w.output_path) for w in writers))
+    return [w.output_path for w in writers]